@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api.cache import LocalTTLCache
+from foodgram.metrics import registry
+
+local_tokens = LocalTTLCache(
+    settings.TOKEN_CACHE_SIZE,
+    settings.TOKEN_CACHE_TIMEOUT
+)
+
+
+def get_token_cache():
+    if settings.TOKEN_CACHE_ALIAS:
+        return caches[settings.TOKEN_CACHE_ALIAS]
+    return local_tokens
+
+
+def token_key(key):
+    return f'token:{key}'
+
+
+def invalidate_tokens(keys):
+    get_token_cache().delete_many([token_key(key) for key in keys])
+
+
+def invalidate_user_tokens(user):
+    invalidate_tokens(
+        Token.objects.filter(user=user).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        entry = cache.get(token_key(key))
+        registry.inc(
+            'foodgram_token_cache_requests_total',
+            {'result': 'miss' if entry is None else 'hit'}
+        )
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            cache.set(
+                token_key(key), entry, settings.TOKEN_CACHE_TIMEOUT
+            )
+        return entry
@@ -0,0 +1,125 @@
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.serializers import BatchSerializer
+
+
+class BatchRelationMixin:
+    batch_model = None
+    batch_target = None
+    batch_field = None
+    batch_exists_error = None
+    batch_missing_error = None
+    batch_not_found_error = 'Объект не найден.'
+
+    def get_batch_ids(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['ids']))
+
+    def get_batch_related(self, user, ids):
+        return set(self.batch_model.objects.filter(
+            user=user, **{f'{self.batch_field}__in': ids}
+        ).values_list(self.batch_field, flat=True))
+
+    def batch_columns(self):
+        quote = connection.ops.quote_name
+        opts = self.batch_model._meta
+        return (
+            quote(opts.db_table),
+            quote(opts.get_field('user').column),
+            quote(opts.get_field(self.batch_field).column)
+        )
+
+    def insert_batch(self, user, ids):
+        table, user_column, column = self.batch_columns()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {} ({}, {}) VALUES {} '
+                'ON CONFLICT DO NOTHING RETURNING {}'.format(
+                    table, user_column, column,
+                    ', '.join(['(%s, %s)'] * len(ids)), column
+                ),
+                [value for pk in ids for value in (user.id, pk)]
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def delete_batch(self, user, ids):
+        table, user_column, column = self.batch_columns()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM {} WHERE {} = %s AND {} IN ({}) '
+                'RETURNING {}'.format(
+                    table, user_column, column,
+                    ', '.join(['%s'] * len(ids)), column
+                ),
+                [user.id, *ids]
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def batch_added(self, user, ids):
+        pass
+
+    def batch_removed(self, user, ids):
+        pass
+
+    def batch_response(self, ids, results):
+        return Response(
+            [dict(results[pk], id=pk) for pk in ids],
+            status=status.HTTP_200_OK
+        )
+
+    @transaction.atomic
+    def batch_create(self, request, *args, **kwargs):
+        ids = self.get_batch_ids(request)
+        user = request.user
+        found = set(self.batch_target.objects.filter(
+            id__in=ids
+        ).values_list('id', flat=True))
+        related = self.get_batch_related(user, ids)
+        results = {}
+        for pk in ids:
+            if pk not in found:
+                results[pk] = {
+                    'status': status.HTTP_404_NOT_FOUND,
+                    'errors': self.batch_not_found_error
+                }
+            elif pk in related:
+                results[pk] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': self.batch_exists_error
+                }
+            else:
+                results[pk] = {'status': status.HTTP_201_CREATED}
+        added = [
+            pk for pk in ids
+            if results[pk]['status'] == status.HTTP_201_CREATED
+        ]
+        inserted = self.insert_batch(user, added) if added else set()
+        for pk in added:
+            if pk not in inserted:
+                results[pk] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': self.batch_exists_error
+                }
+        if inserted:
+            self.batch_added(user, [pk for pk in added if pk in inserted])
+        return self.batch_response(ids, results)
+
+    @transaction.atomic
+    def batch_destroy(self, request, *args, **kwargs):
+        ids = self.get_batch_ids(request)
+        user = request.user
+        removed = self.delete_batch(user, ids)
+        results = {
+            pk: {'status': status.HTTP_204_NO_CONTENT} if pk in removed
+            else {
+                'status': status.HTTP_400_BAD_REQUEST,
+                'errors': self.batch_missing_error
+            }
+            for pk in ids
+        }
+        if removed:
+            self.batch_removed(user, [pk for pk in ids if pk in removed])
+        return self.batch_response(ids, results)
@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from foodgram.metrics import registry
+from main.constants import API_CACHE_ALIAS, API_VERSION_CACHE_ALIAS
+
+
+def get_cache():
+    return caches[API_CACHE_ALIAS]
+
+
+def get_version_cache():
+    return caches[API_VERSION_CACHE_ALIAS]
+
+
+def version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    cache = get_version_cache()
+    version = cache.get(version_key(namespace))
+    if version is None:
+        cache.add(version_key(namespace), uuid.uuid4().hex, None)
+        version = cache.get(version_key(namespace))
+    return version
+
+
+def bump_version(namespace):
+    get_version_cache().set(version_key(namespace), uuid.uuid4().hex, None)
+
+
+class LocalTTLCache:
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CachedResponseMixin:
+    cache_namespace = None
+
+    def get_cache_key(self, request):
+        path = hashlib.sha256(
+            request.get_full_path().encode('utf-8')
+        ).hexdigest()
+        version = get_version(self.cache_namespace)
+        return f'response:{self.cache_namespace}:{version}:{path}'
+
+    def cached_response(self, request, render):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        registry.inc(
+            'foodgram_cache_requests_total',
+            {
+                'namespace': self.cache_namespace,
+                'result': 'miss' if entry is None else 'hit'
+            }
+        )
+        if entry is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+            content = JSONRenderer().render(response.data)
+            etag = '"{}"'.format(hashlib.sha256(content).hexdigest())
+            entry = (etag, content)
+            cache.set(key, entry)
+        etag, content = entry
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (
+            etag in parse_etags(if_none_match) or if_none_match == '*'
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                content,
+                content_type='application/json'
+            )
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: super(CachedResponseMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: super(CachedResponseMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
@@ -0,0 +1,92 @@
+import csv
+import os
+import tempfile
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from main.constants import (
+    EXPORT_CHUNK_SIZE,
+    PDF_FONT_NAME,
+    PDF_FONT_PATH,
+    PDF_FONT_SIZE,
+    PDF_MARGIN,
+    SHOPPING_CART_TITLE
+)
+from main.models import ShoppingCartItem
+
+
+def shopping_cart_ingredients(user):
+    return ShoppingCartItem.objects.filter(
+        user=user
+    ).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'total_amount'
+    ).order_by(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def format_line(index, name, measurement_unit, total):
+    return f'{index}. {name} - {total} {measurement_unit}.'
+
+
+def render_txt(rows):
+    yield SHOPPING_CART_TITLE + '\n'
+    for index, row in enumerate(rows, 1):
+        yield format_line(index, *row) + '\n'
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for name, measurement_unit, total in rows:
+        yield writer.writerow((name, total, measurement_unit))
+
+
+def get_pdf_font():
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    if os.path.exists(PDF_FONT_PATH):
+        pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, PDF_FONT_PATH))
+        return PDF_FONT_NAME
+    return 'Helvetica'
+
+
+def render_pdf(rows):
+    font = get_pdf_font()
+    _, height = A4
+    with tempfile.SpooledTemporaryFile() as buffer:
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        pdf.setFont(font, PDF_FONT_SIZE)
+        top = height - PDF_MARGIN
+        pdf.drawString(PDF_MARGIN, top, SHOPPING_CART_TITLE)
+        y = top - PDF_FONT_SIZE * 2
+        for index, row in enumerate(rows, 1):
+            if y < PDF_MARGIN:
+                pdf.showPage()
+                pdf.setFont(font, PDF_FONT_SIZE)
+                y = top
+            pdf.drawString(PDF_MARGIN, y, format_line(index, *row))
+            y -= PDF_FONT_SIZE * 1.5
+        pdf.save()
+        buffer.seek(0)
+        for chunk in iter(lambda: buffer.read(EXPORT_CHUNK_SIZE), b''):
+            yield chunk
+
+
+EXPORT_FORMATS = {
+    'txt': (render_txt, 'text/plain; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'pdf': (render_pdf, 'application/pdf'),
+}
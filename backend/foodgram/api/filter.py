@@ -1,10 +1,21 @@
+from django.db.models import Case, IntegerField, Value, When
 from django_filters import filters
 from django_filters.rest_framework import FilterSet
-from rest_framework.filters import SearchFilter
 
 from main.models import Recipe, Tag, User
 
 
+class StableOrderingFilter(filters.OrderingFilter):
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        ordering = [self.get_ordering_value(param) for param in value]
+        return queryset.order_by(
+            *ordering, '-id' if ordering[-1].startswith('-') else 'id'
+        )
+
+
 class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(field_name='tags__slug',
                                              queryset=Tag.objects.all(),
@@ -14,6 +25,10 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = StableOrderingFilter(
+        fields=('favorites_count', 'in_carts_count', 'pub_date')
+    )
 
     def filter_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
@@ -25,13 +40,21 @@ class RecipeFilter(FilterSet):
             return queryset.filter(recipe_shop__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return queryset.filter(name__icontains=value).annotate(
+            name_rank=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('name_rank', 'name', 'id')
+
     class Meta:
         model = Recipe
         fields = [
             'tags',
             'author'
         ]
-
-
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
@@ -1,6 +1,247 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import partial
+
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator
+)
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.cache import get_cache
+from main.constants import (
+    APPROXIMATE_COUNT_THRESHOLD,
+    COUNT_CACHE_TIMEOUT,
+    USER_FILTERS
+)
+from main.feed import feed_keys
 
 
 class PagePagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            return max(int(row[0]), 0) if row else None
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        return int(cursor.fetchone()[0][0]['Plan']['Plan Rows'])
+
+
+class ApproximatePage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self.more = has_next
+
+    def has_next(self):
+        return self.more
+
+
+class ApproximatePaginator(Paginator):
+
+    def __init__(self, *args, cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        cache = get_cache()
+        count = cache.get(self.cache_key)
+        if count is not None:
+            self.approximate = True
+            return count
+        count = estimate_count(self.object_list)
+        if count is None or count < APPROXIMATE_COUNT_THRESHOLD:
+            count = self.object_list.count()
+            if count < APPROXIMATE_COUNT_THRESHOLD:
+                return count
+        else:
+            self.approximate = True
+        cache.set(self.cache_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def validate_number(self, number):
+        self.count
+        if not self.approximate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return ApproximatePage(
+            objects[:self.per_page],
+            number,
+            self,
+            len(objects) > self.per_page
+        )
+
+
+class ApproximateCountPagination(PagePagination):
+
+    def get_cache_key(self, request, view):
+        params = sorted(
+            (key, sorted(request.query_params.getlist(key)))
+            for key in request.query_params
+            if key not in (self.page_query_param, self.page_size_query_param)
+        )
+        user = request.user.pk if any(
+            request.query_params.get(key) for key in USER_FILTERS
+        ) else None
+        digest = hashlib.sha256(
+            repr((request.path, params, user)).encode('utf-8')
+        ).hexdigest()
+        return f'count:{digest}'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            ApproximatePaginator,
+            cache_key=self.get_cache_key(request, view)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_approximate', self.page.paginator.approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class RecipeCursorPagination(BasePagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Неверный курсор.'
+    unsupported_params = ('ordering', 'search')
+    unsupported_params_message = (
+        'Параметр {} не поддерживается с курсорной пагинацией.'
+    )
+
+    @classmethod
+    def requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params
+            or request.query_params.get(cls.mode_query_param) == 'cursor'
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return page_size if page_size > 0 else self.page_size
+
+    def encode_cursor(self, recipe):
+        return urlsafe_b64encode(
+            f'{recipe.pub_date.isoformat()}|{recipe.id}'.encode()
+        ).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            pub_date, pk = urlsafe_b64decode(
+                cursor.encode()
+            ).decode().rsplit('|', 1)
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
+
+    def check_params(self, request):
+        for param in self.unsupported_params:
+            if request.query_params.get(param, '').strip():
+                raise ValidationError(
+                    {param: self.unsupported_params_message.format(param)}
+                )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.check_params(request)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        queryset = queryset.order_by('pub_date', 'id')
+        if cursor is not None:
+            pub_date, pk = cursor
+            queryset = queryset.filter(
+                Q(pub_date__gt=pub_date) | Q(id__gt=pk),
+                pub_date__gte=pub_date
+            )
+        results = list(queryset[:page_size + 1])
+        self.next_recipe = (
+            results[page_size - 1] if len(results) > page_size else None
+        )
+        return results[:page_size]
+
+    def get_next_link(self):
+        if self.next_recipe is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_recipe)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class FeedPagination(RecipeCursorPagination):
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        keys = feed_keys(
+            request.user, self.decode_cursor(request), page_size + 1
+        )
+        recipes = queryset.in_bulk([pk for pub_date, pk in keys[:page_size]])
+        results = [
+            recipes[pk] for pub_date, pk in keys[:page_size] if pk in recipes
+        ]
+        self.next_recipe = (
+            results[-1] if len(keys) > page_size and results else None
+        )
+        return results
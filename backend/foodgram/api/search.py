@@ -0,0 +1,80 @@
+import bisect
+import threading
+import time
+
+from api.cache import get_version
+from main.constants import (
+    INGREDIENT_INDEX_TTL,
+    INGREDIENT_SEARCH_LIMIT,
+    INGREDIENTS_CACHE,
+    NGRAM_SIZE
+)
+from main.models import Ingredient
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0
+        self._version = None
+
+    def invalidate(self):
+        self._index = None
+
+    def build(self):
+        items = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda item: (item['name'].casefold(), item['id'])
+        )
+        keys = [item['name'].casefold() for item in items]
+        grams = {}
+        for position, key in enumerate(keys):
+            for gram in ngrams(key):
+                grams.setdefault(gram, set()).add(position)
+        return items, keys, grams
+
+    def get_index(self):
+        index = self._index
+        version = get_version(INGREDIENTS_CACHE)
+        expired = time.monotonic() - self._built_at > INGREDIENT_INDEX_TTL
+        if index is None or expired or self._version != version:
+            with self._lock:
+                if self._index is index:
+                    self._index = self.build()
+                    self._built_at = time.monotonic()
+                    self._version = version
+                index = self._index
+        return index
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        items, keys, grams = self.get_index()
+        query = query.strip().casefold()
+        if not query:
+            return items
+        found = []
+        start = bisect.bisect_left(keys, query)
+        for position in range(start, len(keys)):
+            if len(found) >= limit or not keys[position].startswith(query):
+                break
+            found.append(position)
+        if len(query) < NGRAM_SIZE:
+            candidates = range(len(keys))
+        else:
+            postings = [grams.get(gram, set()) for gram in ngrams(query)]
+            candidates = sorted(set.intersection(*postings))
+        prefix = set(found)
+        for position in candidates:
+            if len(found) >= limit:
+                break
+            if position not in prefix and query in keys[position]:
+                found.append(position)
+        return [items[position] for position in found]
+
+
+ingredient_index = IngredientIndex()
@@ -6,16 +6,22 @@ from django.core.validators import (
     MinValueValidator
 )
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from rest_framework.serializers import ModelSerializer
 
+from main.cart import update_recipe_in_carts
+from main.counters import change_counter
+from main.feed import backfill, fan_out
 from main.constants import (
+    BATCH_MAX_SIZE,
     MAX_AMOUNT,
     MAX_LENGTH,
     MIN_AMOUNT
 )
+from main.images import enqueue, rendition_urls
 from main.models import (
     Follow,
     Ingredient,
@@ -24,25 +30,47 @@ from main.models import (
     RecipeShop,
     RecipeTag,
     RecipeFavorite,
+    ShoppingCartItem,
     Tag,
     User
 )
 
 
+def update_fields(instance, validated_data):
+    for field, value in validated_data.items():
+        setattr(instance, field, value)
+    instance.save(update_fields=list(validated_data))
+    return instance
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(validators=(EmailValidator,))
     username = serializers.CharField()
     avatar = Base64ImageField(required=False)
     is_subscribed = serializers.SerializerMethodField(required=False)
+    avatar_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'username', 'first_name', 'last_name',
-            'is_subscribed', 'avatar'
+            'is_subscribed', 'avatar', 'avatar_renditions'
+        )
+
+    def update(self, instance, validated_data):
+        instance = update_fields(instance, validated_data)
+        if 'avatar' in validated_data:
+            enqueue(instance, 'avatar')
+        return instance
+
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(
+            obj, 'avatar', self.context.get('request')
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'subscribed'):
+            return obj.subscribed
         request = self.context.get('request')
         is_user = request and request.user.id
         return is_user and Follow.objects.filter(
@@ -87,30 +115,23 @@ class TokenSerializer(serializers.ModelSerializer):
             'email', 'password', 'auth_token'
         )
 
-    @staticmethod
-    def get_user_email(email):
-        return get_object_or_404(
-            User, email=email
-        )
-
     def get_auth_token(self, obj):
-        request = self.context.get('request')
-        if request.data.get('email') and request.data.get('password'):
-            user = self.get_user_email(
-                self,
-                request.data['email']
-            )
-            if user.check_password(request.data['password']):
-                return Token.objects.get(user=user).key
+        return obj.key
+
+    def validate(self, data):
+        user = User.objects.filter(email=data['email']).first()
+        if user is None:
+            User().set_password(data['password'])
+        elif user.check_password(data['password']) and user.is_active:
+            data['user'] = user
+            return data
+        raise ValidationError('Неверный email или пароль.')
 
     def create(self, validated_data):
-        user = self.get_user_email(
-            self,
-            validated_data.get('email')
+        token, created = Token.objects.get_or_create(
+            user=validated_data['user']
         )
-        if user.check_password(validated_data.get('password')):
-            obj, created = Token.objects.get_or_create(user=user)
-            return obj
+        return token
 
 
 class PasswordSerializer(serializers.ModelSerializer):
@@ -138,7 +159,7 @@ class PasswordSerializer(serializers.ModelSerializer):
         user = request.user
         if user.check_password(validated_data['current_password']):
             user.set_password(validated_data['new_password'])
-            user.save()
+            user.save(update_fields=['password'])
             return user
 
 
@@ -191,6 +212,21 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         )
 
 
+class ShoppingCartItemSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='ingredient.id')
+    name = serializers.CharField(source='ingredient.name')
+    measurement_unit = serializers.CharField(
+        source='ingredient.measurement_unit'
+    )
+    amount = serializers.IntegerField(source='total_amount')
+
+    class Meta:
+        model = ShoppingCartItem
+        fields = (
+            'id', 'name', 'measurement_unit', 'amount'
+        )
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField()
     image = Base64ImageField()
@@ -199,15 +235,27 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     ingredients = serializers.SerializerMethodField()
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'text', 'cooking_time', 'image', 'author',
-            'tags', 'is_in_shopping_cart', 'is_favorited', 'ingredients'
+            'id', 'name', 'text', 'cooking_time', 'image', 'image_renditions',
+            'author', 'tags', 'is_in_shopping_cart', 'is_favorited',
+            'ingredients', 'favorites_count'
         )
 
+    def get_image_renditions(self, obj):
+        return rendition_urls(obj, 'image', self.context.get('request'))
+
+    def to_representation(self, obj):
+        if hasattr(obj, 'author_subscribed'):
+            obj.author.subscribed = obj.author_subscribed
+        return super().to_representation(obj)
+
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'in_shopping_cart'):
+            return obj.in_shopping_cart
         request = self.context.get('request')
         return request.user.id and RecipeShop.objects.filter(
             recipe=obj,
@@ -215,6 +263,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         ).exists()
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'favorited'):
+            return obj.favorited
         request = self.context.get('request')
         return request.user.id and RecipeFavorite.objects.filter(
             recipe=obj,
@@ -222,10 +272,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         ).exists()
 
     def get_ingredients(self, obj):
-        rec_ingrs = RecipeIngredient.objects.filter(
-            recipe=obj
+        serializer = RecipeIngredientSerializer(
+            obj.recipeingredient_set.all(),
+            many=True
         )
-        serializer = RecipeIngredientSerializer(rec_ingrs, many=True)
         return serializer.data
 
 
@@ -258,25 +308,97 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                     'Думаешь что ингредиента может быть меньше 0?'
                 )
             ingredients_valid.append(ingredient.get('id'))
+        missing = set(ingredients_valid) - set(
+            Ingredient.objects.in_bulk(ingredients_valid)
+        )
+        if missing:
+            raise ValidationError(
+                f'Нет ингредиентов с id: {sorted(missing)}'
+            )
+        if 'tags' in data:
+            data['tags'] = self.validate_tag_ids(data['tags'])
         return data
 
+    def validate_tag_ids(self, tags):
+        try:
+            tags = list(dict.fromkeys(int(tag_id) for tag_id in tags))
+        except (TypeError, ValueError):
+            raise ValidationError('Теги передаются списком id.')
+        missing = set(tags) - set(Tag.objects.in_bulk(tags))
+        if missing:
+            raise ValidationError(f'Нет тегов с id: {sorted(missing)}')
+        return tags
+
     def ingredients_create(self, ingredients, recipe):
         RecipeIngredient.objects.bulk_create(
             [RecipeIngredient(
                 recipe=recipe,
                 amount=int(ingredient['amount']),
-                ingredient=Ingredient.objects.get(id=ingredient['id'])
+                ingredient_id=ingredient['id']
             ) for ingredient in ingredients]
         )
 
     def tags_create(self, tags, recipe):
         RecipeTag.objects.bulk_create(
-            [RecipeTag(
+            [RecipeTag(recipe=recipe, tag_id=tag_id) for tag_id in tags]
+        )
+
+    def tags_update(self, tags, recipe):
+        old_tags = set(
+            RecipeTag.objects.filter(recipe=recipe).values_list(
+                'tag_id', flat=True
+            )
+        )
+        removed = old_tags - set(tags)
+        if removed:
+            RecipeTag.objects.filter(
                 recipe=recipe,
-                tag=get_object_or_404(Tag, id=tag_id)
-            ) for tag_id in tags]
+                tag_id__in=removed
+            ).delete()
+        self.tags_create(
+            [tag_id for tag_id in tags if tag_id not in old_tags],
+            recipe
         )
 
+    def ingredients_update(self, ingredients, recipe):
+        old = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            )
+        }
+        old_amounts = {
+            ingredient_id: recipe_ingredient.amount
+            for ingredient_id, recipe_ingredient in old.items()
+        }
+        new_amounts = {
+            ingredient['id']: int(ingredient['amount'])
+            for ingredient in ingredients
+        }
+        changed = []
+        for ingredient_id, amount in new_amounts.items():
+            recipe_ingredient = old.get(ingredient_id)
+            if recipe_ingredient is not None and (
+                recipe_ingredient.amount != amount
+            ):
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        removed = old_amounts.keys() - new_amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+        self.ingredients_create(
+            [
+                ingredient for ingredient in ingredients
+                if ingredient['id'] not in old
+            ],
+            recipe
+        )
+        return old_amounts, new_amounts
+
     @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
@@ -284,22 +406,36 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data, author=author)
+        change_counter(User, author.id, 'recipes_count', 1)
         self.tags_create(tags, recipe)
         self.ingredients_create(ingredients, recipe)
+        fan_out(recipe)
+        enqueue(recipe, 'image')
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        super().update(instance, validated_data)
-        RecipeTag.objects.filter(recipe=instance).delete()
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        self.tags_create(tags, instance)
-        self.ingredients_create(ingredients, instance)
+        tags = validated_data.pop('tags', None)
+        update_fields(instance, validated_data)
+        if 'image' in validated_data:
+            enqueue(instance, 'image')
+        if tags is not None:
+            self.tags_update(tags, instance)
+        old_amounts, new_amounts = self.ingredients_update(
+            ingredients, instance
+        )
+        if old_amounts != new_amounts:
+            update_recipe_in_carts(instance, old_amounts, new_amounts)
         return instance
 
     def to_representation(self, obj):
         request = self.context.get('request')
+        for cache in ('tags', 'recipeingredient_set'):
+            getattr(obj, '_prefetched_objects_cache', {}).pop(cache, None)
+        prefetch_related_objects(
+            [obj], 'tags', 'recipeingredient_set__ingredient'
+        )
         return RecipeSerializer(obj, context={'request': request}).data
 
 
@@ -320,9 +456,12 @@ class FavoriteSerializer(serializers.ModelSerializer):
         pk = int(self.context.get('pk'))
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
-        RecipeFavorite.objects.get_or_create(
-            recipe=recipe, user=user
-        )
+        with transaction.atomic():
+            favorite, created = RecipeFavorite.objects.get_or_create(
+                recipe=recipe, user=user
+            )
+            if created:
+                change_counter(Recipe, recipe.id, 'favorites_count', 1)
         return recipe
 
 
@@ -333,13 +472,14 @@ class SubscribeSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField(read_only=True)
     is_subscribed = serializers.SerializerMethodField(read_only=True)
     recipes = serializers.SerializerMethodField(read_only=True)
-    recipes_count = serializers.SerializerMethodField(read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'username', 'first_name', 'last_name',
-            'is_subscribed', 'recipes', 'recipes_count', 'avatar'
+            'is_subscribed', 'recipes', 'recipes_count', 'followers_count',
+            'avatar'
         )
         depth = 2
 
@@ -347,22 +487,16 @@ class SubscribeSerializer(serializers.ModelSerializer):
         return True
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(obj, 'recipes_preview'):
+            recipes = obj.recipes_preview
+        else:
+            limit = self.context.get('recipes_limit')
+            recipes = obj.recipes.prefetch_related('image_jobs')
+            if limit:
+                recipes = recipes[:limit]
         serializer = RecipeShortSerializer(recipes, many=True, read_only=True)
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        request = self.context.get('request')
-        if self.context.get('pk'):
-            return Recipe.objects.filter(
-                author=request.user
-            ).count()
-        return None
-
     def create(self, validated_data):
         request = self.context.get('request')
         user = request.user
@@ -372,7 +506,11 @@ class SubscribeSerializer(serializers.ModelSerializer):
             if not Follow.objects.filter(
                 author=author, user=user
             ).exists():
-                Follow.objects.create(author=author, user=user)
+                with transaction.atomic():
+                    Follow.objects.create(author=author, user=user)
+                    change_counter(User, author.id, 'followers_count', 1)
+                    author.followers_count += 1
+                    backfill(user, author)
                 return author
 
 
@@ -399,6 +537,7 @@ class RecipeShopSerializer(serializers.ModelSerializer):
 
 class RecipeShortSerializer(ModelSerializer):
     image = Base64ImageField()
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -406,5 +545,20 @@ class RecipeShortSerializer(ModelSerializer):
             'id',
             'name',
             'image',
+            'image_renditions',
             'cooking_time'
         )
+
+    def get_image_renditions(self, obj):
+        return rendition_urls(obj, 'image', self.context.get('request'))
+
+
+class BatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_SIZE,
+        error_messages={
+            'max_length': f'Не больше {BATCH_MAX_SIZE} id за запрос.'
+        }
+    )
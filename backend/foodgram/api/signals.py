@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens, invalidate_user_tokens
+from api.cache import bump_version
+from api.search import ingredient_index
+from main.constants import INGREDIENTS_CACHE, TAGS_CACHE
+from main.models import Ingredient, Tag, User
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    ingredient_index.invalidate()
+    bump_version(INGREDIENTS_CACHE)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_version(TAGS_CACHE)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_user_tokens(instance)
@@ -0,0 +1,78 @@
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from main.counters import find_drift, reconcile
+from main.models import (
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeFavorite,
+    RecipeIngredient,
+    RecipeShop,
+    RecipeTag,
+    Tag,
+    User
+)
+
+
+class ApiTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user('reader')
+        cls.tags = [
+            Tag.objects.create(name=f'тег {number}', slug=f'tag-{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}',
+                measurement_unit='г'
+            )
+            for number in range(50)
+        ]
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @staticmethod
+    def create_user(username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='Secret-pass-1'
+        )
+
+    @classmethod
+    def create_recipe(cls, author, name, ingredients=3):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text='описание',
+            cooking_time=10
+        )
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag) for tag in cls.tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in cls.ingredients[:ingredients]
+        )
+        return recipe
+
+    def create_recipes(self, count, author=None):
+        author = author or self.create_user(f'author{Recipe.objects.count()}')
+        recipes = [
+            self.create_recipe(author, f'рецепт {author.pk} {number}')
+            for number in range(count)
+        ]
+        for recipe in recipes:
+            RecipeFavorite.objects.create(user=self.user, recipe=recipe)
+            RecipeShop.objects.create(user=self.user, recipe=recipe)
+        Follow.objects.get_or_create(user=self.user, author=author)
+        reconcile(find_drift())
+        return recipes
@@ -0,0 +1,61 @@
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import get_token_cache, token_key
+from api.tests.base import ApiTestCase
+from main.models import User
+
+
+class CachedTokenAuthenticationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_default_cache_is_shared(self):
+        self.assertIs(get_token_cache(), caches['tokens'])
+
+    def test_cache_hit_does_not_query(self):
+        self.client.get('/api/tags/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_user_save_invalidates_entry(self):
+        self.client.get('/api/users/me/')
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое'
+        user.save(update_fields=['first_name'])
+        self.assertIsNone(get_token_cache().get(token_key(self.token.key)))
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['first_name'], 'Новое')
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/users/me/')
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_logout_revokes_token(self):
+        self.client.get('/api/users/me/')
+        self.assertEqual(
+            self.client.post('/api/auth/token/logout/').status_code, 204
+        )
+        self.assertIsNone(get_token_cache().get(token_key(self.token.key)))
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get('/api/users/me/')
+        User.objects.get(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    @override_settings(TOKEN_CACHE_ALIAS='')
+    def test_local_cache_without_alias(self):
+        self.assertIsNot(get_token_cache(), caches['tokens'])
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from api.tests.base import ApiTestCase
+from api.views import FavoriteViewSet
+from main.models import Follow, Recipe, RecipeFavorite, User
+
+
+class BatchRelationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipes = [
+            self.create_recipe(self.author, f'рецепт {number}')
+            for number in range(3)
+        ]
+
+    def favorites_count(self, recipe):
+        return Recipe.objects.get(pk=recipe.pk).favorites_count
+
+    def statuses(self, response):
+        return {item['id']: item['status'] for item in response.data}
+
+    def test_create_reports_each_id(self):
+        first, second, _ = self.recipes
+        RecipeFavorite.objects.create(user=self.user, recipe=second)
+        response = self.client.post(
+            '/api/recipes/favorite/batch/',
+            {'ids': [first.id, second.id, 9999]},
+            format='json'
+        )
+        self.assertEqual(
+            self.statuses(response),
+            {first.id: 201, second.id: 400, 9999: 404}
+        )
+        self.assertEqual(self.favorites_count(first), 1)
+        self.assertEqual(self.favorites_count(second), 0)
+
+    def test_create_skips_side_effects_for_concurrent_inserts(self):
+        first, second, _ = self.recipes
+        RecipeFavorite.objects.create(user=self.user, recipe=second)
+        with mock.patch.object(
+            FavoriteViewSet, 'get_batch_related', return_value=set()
+        ):
+            response = self.client.post(
+                '/api/recipes/favorite/batch/',
+                {'ids': [first.id, second.id]},
+                format='json'
+            )
+        self.assertEqual(
+            self.statuses(response), {first.id: 201, second.id: 400}
+        )
+        self.assertEqual(self.favorites_count(first), 1)
+        self.assertEqual(self.favorites_count(second), 0)
+
+    def test_destroy_applies_side_effects_to_deleted_rows(self):
+        first, second, _ = self.recipes
+        self.client.post(
+            '/api/recipes/favorite/batch/',
+            {'ids': [first.id]},
+            format='json'
+        )
+        response = self.client.delete(
+            '/api/recipes/favorite/batch/',
+            {'ids': [first.id, second.id]},
+            format='json'
+        )
+        self.assertEqual(
+            self.statuses(response), {first.id: 204, second.id: 400}
+        )
+        self.assertFalse(RecipeFavorite.objects.exists())
+        self.assertEqual(self.favorites_count(first), 0)
+        self.assertEqual(self.favorites_count(second), 0)
+
+    def test_subscribe_batch_counts_followers(self):
+        other = self.create_user('other')
+        Follow.objects.create(user=self.user, author=other)
+        response = self.client.post(
+            '/api/users/subscribe/batch/',
+            {'ids': [self.author.id, other.id]},
+            format='json'
+        )
+        self.assertEqual(
+            self.statuses(response), {self.author.id: 201, other.id: 400}
+        )
+        self.assertEqual(
+            User.objects.get(pk=self.author.pk).followers_count, 1
+        )
+        self.assertEqual(User.objects.get(pk=other.pk).followers_count, 0)
@@ -0,0 +1,40 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+
+from api.tests.base import ApiTestCase
+from main.models import Recipe
+
+
+class BenchmarkCommandTests(ApiTestCase):
+
+    def benchmark(self, **options):
+        output = io.StringIO()
+        call_command('benchmark', stdout=output, warmup=0, **options)
+        return output.getvalue()
+
+    def test_requires_two_requests(self):
+        self.create_recipes(2)
+        with self.assertRaisesMessage(CommandError, '--requests'):
+            self.benchmark(requests=1, scenario=['recipe_detail'])
+
+    def test_write_scenarios_leave_no_files(self):
+        self.create_recipes(2)
+        recipes = Recipe.objects.count()
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                output = self.benchmark(
+                    requests=2,
+                    scenario=['recipe_create', 'recipe_update']
+                )
+            files = [
+                name for _, _, names in os.walk(media_root) for name in names
+            ]
+        self.assertIn('recipe_create', output)
+        self.assertIn('errors=0', output)
+        self.assertEqual(files, [])
+        self.assertEqual(Recipe.objects.count(), recipes)
@@ -0,0 +1,57 @@
+from django.core.cache import caches
+
+from api.cache import bump_version, get_version_cache
+from api.tests.base import ApiTestCase
+from main.constants import API_CACHE_ALIAS, INGREDIENTS_CACHE, TAGS_CACHE
+from main.models import Ingredient, Tag
+
+
+class CachedResponseTests(ApiTestCase):
+
+    def tag_names(self, response):
+        return [tag['name'] for tag in response.json()]
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_save_invalidates(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        Tag.objects.create(name='новый', slug='new')
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('новый', self.tag_names(response))
+
+    def test_delete_invalidates(self):
+        self.client.get('/api/tags/')
+        Tag.objects.get(pk=self.tags[0].pk).delete()
+        response = self.client.get('/api/tags/')
+        self.assertNotIn(self.tags[0].name, self.tag_names(response))
+
+    def test_versions_live_outside_the_response_cache(self):
+        self.assertIsNot(get_version_cache(), caches[API_CACHE_ALIAS])
+
+    def test_version_bump_from_another_worker(self):
+        self.client.get('/api/tags/')
+        Tag.objects.filter(pk=self.tags[0].pk).update(name='переименован')
+        bump_version(TAGS_CACHE)
+        response = self.client.get('/api/tags/')
+        self.assertIn('переименован', self.tag_names(response))
+
+    def test_ingredient_index_follows_shared_version(self):
+        self.client.get('/api/ingredients/?name=ябл')
+        Ingredient.objects.bulk_create([
+            Ingredient(name='яблоко', measurement_unit='шт')
+        ])
+        bump_version(INGREDIENTS_CACHE)
+        response = self.client.get('/api/ingredients/?name=ябл')
+        self.assertEqual(
+            [item['name'] for item in response.json()], ['яблоко']
+        )
@@ -0,0 +1,81 @@
+import io
+import tempfile
+from types import SimpleNamespace
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import PasswordSerializer
+from api.tests.base import ApiTestCase
+from main.counters import find_drift
+from main.models import Recipe, User
+
+
+class StaleCounterTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        User.objects.filter(pk=self.user.pk).update(
+            followers_count=5, recipes_count=3
+        )
+
+    def assert_counters_kept(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.followers_count, 5)
+        self.assertEqual(user.recipes_count, 3)
+
+    def test_avatar_delete_keeps_counters(self):
+        response = self.client.delete('/api/users/me/avatar/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters_kept()
+
+    def test_set_password_keeps_counters(self):
+        serializer = PasswordSerializer(
+            context={'request': SimpleNamespace(user=self.user)}
+        )
+        serializer.create({
+            'current_password': 'Secret-pass-1',
+            'new_password': 'Other-pass-2'
+        })
+        self.assert_counters_kept()
+        self.assertTrue(
+            User.objects.get(pk=self.user.pk).check_password('Other-pass-2')
+        )
+
+    def test_recipe_update_does_not_write_counters(self):
+        recipe = self.create_recipe(self.user, 'рецепт')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{recipe.id}/',
+                {
+                    'name': 'новое имя',
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 5}
+                    ]
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "main_recipe"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('favorites_count', updates[0])
+        self.assertNotIn('in_carts_count', updates[0])
+
+
+class LoadDataTests(TestCase):
+
+    def test_load_data_reconciles_counters(self):
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                call_command('load_data', stdout=io.StringIO())
+        self.assertTrue(Recipe.objects.exists())
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(
+            sum(User.objects.values_list('recipes_count', flat=True)),
+            Recipe.objects.count()
+        )
@@ -0,0 +1,106 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+
+from api.tests.base import ApiTestCase
+from main.feed import backfill
+from main.models import FeedEntry, Follow, User
+
+
+class RebuildFeedTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.authors = [
+            self.create_user(f'author{number}') for number in range(3)
+        ]
+        for number, author in enumerate(self.authors):
+            for index in range(number + 2):
+                self.create_recipe(author, f'рецепт {number}-{index}')
+        self.readers = [
+            self.create_user(f'follower{number}') for number in range(2)
+        ]
+        for reader in self.readers:
+            for author in self.authors:
+                Follow.objects.create(user=reader, author=author)
+        User.objects.filter(pk=self.authors[2].pk).update(followers_count=2)
+
+    def entries(self):
+        return set(FeedEntry.objects.values_list(
+            'user_id', 'recipe_id', 'author_id', 'pub_date'
+        ))
+
+    def rebuild(self):
+        call_command('rebuild_feed', stdout=io.StringIO())
+        return self.entries()
+
+    def backfill_all(self):
+        FeedEntry.objects.all().delete()
+        for follow in Follow.objects.select_related('user', 'author'):
+            backfill(follow.user, follow.author)
+        return self.entries()
+
+    @mock.patch('main.feed.FEED_BACKFILL_LIMIT', 3)
+    def test_rebuild_matches_backfill(self):
+        self.assertEqual(self.rebuild(), self.backfill_all())
+
+    @mock.patch('main.feed.FEED_BACKFILL_LIMIT', 3)
+    def test_rebuild_limits_recipes_per_author(self):
+        entries = self.rebuild()
+        author = self.authors[2]
+        self.assertEqual(
+            len([entry for entry in entries if entry[2] == author.id]),
+            3 * len(self.readers)
+        )
+
+    @mock.patch('main.feed.FEED_FANOUT_LIMIT', 2)
+    def test_rebuild_skips_pulled_authors(self):
+        entries = self.rebuild()
+        self.assertFalse(
+            [entry for entry in entries if entry[2] == self.authors[2].id]
+        )
+        self.assertTrue(entries)
+
+    def test_rebuild_query_count_does_not_grow_with_follows(self):
+        with self.assertNumQueries(4):
+            call_command('rebuild_feed', stdout=io.StringIO())
+
+
+@mock.patch('main.feed.FEED_FANOUT_LIMIT', 3)
+class FanOutLimitTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.readers = [
+            self.create_user(f'follower{number}') for number in range(3)
+        ]
+        for reader in self.readers:
+            self.client.force_authenticate(reader)
+            self.client.post(f'/api/users/{self.author.id}/subscribe/')
+        self.recipe = self.create_recipe(self.author, 'рецепт')
+
+    def feed_ids(self, reader):
+        self.client.force_authenticate(reader)
+        response = self.client.get('/api/recipes/feed/')
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_pulled_recipes_survive_dropping_below_limit(self):
+        self.assertEqual(self.feed_ids(self.readers[0]), [self.recipe.id])
+        self.client.force_authenticate(self.readers[2])
+        self.client.delete(f'/api/users/{self.author.id}/subscribe/')
+        for reader in self.readers[:2]:
+            self.assertEqual(self.feed_ids(reader), [self.recipe.id])
+        self.assertEqual(self.feed_ids(self.readers[2]), [])
+
+    def test_batch_unsubscribe_refills(self):
+        self.client.force_authenticate(self.readers[2])
+        self.client.delete(
+            '/api/users/subscribe/batch/',
+            {'ids': [self.author.id]},
+            format='json'
+        )
+        self.assertEqual(
+            FeedEntry.objects.filter(recipe=self.recipe).count(), 2
+        )
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.tests.base import ApiTestCase
+from api.throttling import LoginRateThrottle
+from foodgram.hashers import PBKDF2PasswordHasher
+
+LOGIN_URL = '/api/auth/token/login/'
+
+
+@override_settings(LOGIN_THROTTLE_BURST=2, LOGIN_THROTTLE_RATE=0.01)
+class LoginRateThrottleTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        LoginRateThrottle.buckets.clear()
+        self.client = APIClient()
+
+    def login(self, email, address='10.0.0.1', **extra):
+        return self.client.post(
+            LOGIN_URL,
+            {'email': email, 'password': 'wrong'},
+            REMOTE_ADDR=address,
+            **extra
+        )
+
+    def test_ip_bucket(self):
+        self.assertEqual(self.login('a@example.com').status_code, 400)
+        self.assertEqual(self.login('b@example.com').status_code, 400)
+        response = self.login('c@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(
+            self.login('c@example.com', '10.0.0.2').status_code, 400
+        )
+
+    def test_email_bucket(self):
+        for address in ('10.0.0.1', '10.0.0.2'):
+            self.assertEqual(
+                self.login('A@example.com', address).status_code, 400
+            )
+        self.assertEqual(
+            self.login(' a@example.com', '10.0.0.3').status_code, 429
+        )
+
+    def test_clients_behind_shared_proxy_are_separate_by_default(self):
+        for number in range(3):
+            response = self.login(
+                f'user{number}@example.com',
+                '172.16.0.1',
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{number}, 172.16.0.2'
+            )
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(
+        REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, NUM_PROXIES=1)
+    )
+    def test_proxy_count_picks_client_address(self):
+        for number in range(2):
+            self.login(
+                f'user{number}@example.com',
+                '172.16.0.1',
+                HTTP_X_FORWARDED_FOR=f'1.2.3.{number}, 203.0.113.7'
+            )
+        response = self.login(
+            'other@example.com',
+            '172.16.0.1',
+            HTTP_X_FORWARDED_FOR='203.0.113.7'
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_list_body_is_rejected(self):
+        response = self.client.post(
+            LOGIN_URL, [{'email': 'a@example.com'}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class LoginTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        LoginRateThrottle.buckets.clear()
+        self.client = APIClient()
+
+    def login(self, email, password):
+        encode = PBKDF2PasswordHasher.encode
+        with mock.patch.object(
+            PBKDF2PasswordHasher, 'encode', autospec=True, side_effect=encode
+        ) as hasher:
+            response = self.client.post(
+                LOGIN_URL, {'email': email, 'password': password}
+            )
+        return response, hasher.call_count
+
+    def test_success(self):
+        response, hashes = self.login('reader@example.com', 'Secret-pass-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['auth_token'])
+        self.assertEqual(hashes, 1)
+
+    def test_unknown_email_hashes_once(self):
+        response, hashes = self.login('nobody@example.com', 'Secret-pass-1')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(hashes, 1)
+
+    def test_wrong_password_hashes_once(self):
+        response, hashes = self.login('reader@example.com', 'wrong')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(hashes, 1)
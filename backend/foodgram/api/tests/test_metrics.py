@@ -0,0 +1,83 @@
+import glob
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from foodgram.metrics import (
+    DEAD_WORKERS_FILE,
+    collect,
+    labels_key,
+    registry,
+    write_json
+)
+
+DEAD_PID = 2 ** 22 + 12345
+
+
+class MetricsSnapshotTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write_snapshot(self, name, pid, started, value, gauge=0):
+        write_json(os.path.join(self.directory, name), {
+            'pid': pid,
+            'started': started,
+            'counters': [['test_requests_total', {}, value]],
+            'histograms': [
+                ['test_seconds', {}, {
+                    'buckets': [value] * 11, 'sum': value, 'count': value
+                }]
+            ],
+            'gauges': [['test_rss_bytes', {'pid': str(pid)}, gauge]],
+        })
+
+    def totals(self):
+        counters, histograms, gauges = collect()
+        return (
+            counters.get(('test_requests_total', ())),
+            histograms.get(('test_seconds', ()), {}).get('count'),
+            gauges
+        )
+
+    def test_worker_file_is_keyed_by_pid_and_start(self):
+        registry.flush(force=True)
+        name, = [
+            os.path.basename(path)
+            for path in glob.glob(os.path.join(self.directory, '*.json'))
+        ]
+        self.assertEqual(name, f'{os.getpid()}-{registry.started}.json')
+
+    def test_dead_workers_are_folded(self):
+        self.write_snapshot(f'{DEAD_PID}-1.json', DEAD_PID, 1, 5)
+        self.assertEqual(self.totals()[:2], (5, 5))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, f'{DEAD_PID}-1.json')
+        ))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, DEAD_WORKERS_FILE)
+        ))
+        self.write_snapshot(f'{DEAD_PID}-2.json', DEAD_PID, 2, 2)
+        self.assertEqual(self.totals()[:2], (7, 7))
+        self.assertEqual(self.totals()[:2], (7, 7))
+
+    def test_legacy_pid_files_are_folded(self):
+        self.write_snapshot(f'{DEAD_PID}.json', DEAD_PID, None, 3)
+        self.assertEqual(self.totals()[0], 3)
+        self.assertEqual(self.totals()[0], 3)
+
+    def test_reused_pid_keeps_both_totals(self):
+        pid = os.getpid()
+        self.write_snapshot(f'{pid}-1.json', pid, 1, 4, gauge=100)
+        self.write_snapshot(f'{pid}-2.json', pid, 2, 6, gauge=200)
+        counter, _, gauges = self.totals()
+        self.assertEqual(counter, 10)
+        self.assertEqual(
+            gauges[('test_rss_bytes', labels_key({'pid': str(pid)}))], 200
+        )
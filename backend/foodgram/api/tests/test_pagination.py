@@ -0,0 +1,160 @@
+from unittest import mock
+
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.utils import timezone
+
+from api.cache import get_cache
+from api.pagination import ApproximatePaginator
+from api.tests.base import ApiTestCase
+from main.models import Recipe, RecipeFavorite
+
+
+class CursorPaginationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.recipes = [
+            self.create_recipe(author, f'рецепт {number}')
+            for number in range(7)
+        ]
+        Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in self.recipes[2:5]]
+        ).update(pub_date=timezone.now())
+
+    def walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_round_trip_visits_every_recipe_once(self):
+        ids, pages = self.walk('/api/recipes/?pagination=cursor&limit=2')
+        self.assertEqual(
+            ids,
+            list(Recipe.objects.order_by(
+                'pub_date', 'id'
+            ).values_list('id', flat=True))
+        )
+        self.assertEqual(pages, 4)
+
+    def test_last_page_has_no_next(self):
+        response = self.client.get('/api/recipes/?pagination=cursor&limit=7')
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'bm90LWEtZGF0ZXwx', 'MjAyMC0wMS0wMXx4'):
+            response = self.client.get(f'/api/recipes/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
+
+    def test_ordering_and_search_are_rejected(self):
+        for param in ('ordering=-pub_date', 'search=рецепт'):
+            response = self.client.get(
+                f'/api/recipes/?pagination=cursor&{param}'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(param.split('=')[0], response.data)
+
+    def test_blank_search_is_allowed(self):
+        response = self.client.get('/api/recipes/?pagination=cursor&search=')
+        self.assertEqual(response.status_code, 200)
+
+
+@mock.patch('api.pagination.APPROXIMATE_COUNT_THRESHOLD', 5)
+class ApproximateCountPaginationTests(ApiTestCase):
+
+    def get(self, url='/api/recipes/?limit=3'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_small_counts_are_exact_and_not_cached(self):
+        self.create_recipes(4)
+        data = self.get()
+        self.assertEqual(data['count'], 4)
+        self.assertFalse(data['count_approximate'])
+        self.create_recipes(1)
+        self.assertEqual(self.get()['count'], 5)
+
+    def test_large_counts_are_cached(self):
+        self.create_recipes(6)
+        data = self.get()
+        self.assertEqual(data['count'], 6)
+        self.assertFalse(data['count_approximate'])
+        self.create_recipes(2)
+        data = self.get()
+        self.assertEqual(data['count'], 6)
+        self.assertTrue(data['count_approximate'])
+        get_cache().clear()
+        self.assertEqual(self.get()['count'], 8)
+
+    def test_cache_key_follows_filters(self):
+        self.create_recipes(6)
+        self.get()
+        self.create_recipes(2)
+        self.assertEqual(self.get('/api/recipes/?limit=2')['count'], 6)
+        self.assertEqual(
+            self.get('/api/recipes/?limit=3&page=2')['count'], 6
+        )
+        self.assertEqual(
+            self.get(f'/api/recipes/?author={self.user.id}')['count'], 0
+        )
+
+    def test_user_scoped_cache_key(self):
+        self.create_recipes(6)
+        url = '/api/recipes/?is_favorited=true&limit=3'
+        self.assertEqual(self.get(url)['count'], 6)
+        other = self.create_user('other')
+        RecipeFavorite.objects.bulk_create(
+            RecipeFavorite(user=other, recipe=recipe)
+            for recipe in Recipe.objects.all()[:5]
+        )
+        self.client.force_authenticate(other)
+        data = self.get(url)
+        self.assertEqual(data['count'], 5)
+        self.assertFalse(data['count_approximate'])
+
+    def test_estimated_count(self):
+        self.create_recipes(4)
+        with mock.patch('api.pagination.estimate_count', return_value=100):
+            data = self.get()
+        self.assertEqual(data['count'], 100)
+        self.assertTrue(data['count_approximate'])
+
+    def test_next_uses_extra_row_on_approximate_pages(self):
+        self.create_recipes(6)
+        with mock.patch('api.pagination.estimate_count', return_value=100):
+            data = self.get('/api/recipes/?limit=3&page=2')
+            self.assertTrue(data['count_approximate'])
+            self.assertEqual(len(data['results']), 3)
+            self.assertIsNone(data['next'])
+            self.assertIsNotNone(data['previous'])
+            data = self.get('/api/recipes/?limit=3&page=1')
+            self.assertIn('page=2', data['next'])
+            data = self.get('/api/recipes/?limit=4&page=2')
+            self.assertEqual(len(data['results']), 2)
+            self.assertIsNone(data['next'])
+
+    def test_approximate_page_past_the_end_is_empty(self):
+        self.create_recipes(2)
+        with mock.patch('api.pagination.estimate_count', return_value=100):
+            data = self.get('/api/recipes/?limit=3&page=20')
+        self.assertEqual(data['results'], [])
+        self.assertIsNone(data['next'])
+
+    def test_invalid_page_number(self):
+        paginator = ApproximatePaginator(
+            Recipe.objects.order_by('id'), 3, cache_key='count:test'
+        )
+        get_cache().set('count:test', 100)
+        with self.assertRaises(PageNotAnInteger):
+            paginator.validate_number('x')
+        with self.assertRaises(EmptyPage):
+            paginator.validate_number(0)
+        self.assertEqual(paginator.validate_number('50'), 50)
@@ -0,0 +1,40 @@
+from django.test import override_settings
+
+from api.tests.base import ApiTestCase
+from foodgram.middleware import QueryBudgetExceeded
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.recipes = self.create_recipes(6)
+
+    def test_recipe_list_within_budget(self):
+        response = self.client.get('/api/recipes/?limit=6')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_recipe_detail_within_budget(self):
+        response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_recipe_list_within_budget(self):
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/recipes/?limit=6')
+        self.assertEqual(response.status_code, 200)
+
+    def test_subscriptions_within_budget(self):
+        response = self.client.get('/api/users/subscriptions/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_tags_and_ingredients_within_budget(self):
+        for url in ('/api/tags/', '/api/ingredients/?name=ингр'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'RecipeViewSet.list': 1})
+    def test_budget_overrun_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/api/recipes/')
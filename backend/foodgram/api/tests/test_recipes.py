@@ -0,0 +1,91 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import ApiTestCase
+
+
+class RecipeListQueryTests(ApiTestCase):
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_list_query_count_does_not_grow_with_page(self):
+        self.create_recipes(2)
+        self.count_queries('/api/recipes/?limit=2')
+        small, response = self.count_queries('/api/recipes/?limit=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.create_recipes(10)
+        large, response = self.count_queries('/api/recipes/?limit=12')
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(small, large)
+
+    def test_list_reads_annotated_flags(self):
+        recipe = self.create_recipes(1)[0]
+        _, response = self.count_queries('/api/recipes/')
+        result = response.data['results'][0]
+        self.assertEqual(result['id'], recipe.id)
+        self.assertTrue(result['is_favorited'])
+        self.assertTrue(result['is_in_shopping_cart'])
+        self.assertTrue(result['author']['is_subscribed'])
+        self.assertEqual(len(result['ingredients']), 3)
+        self.assertEqual(len(result['tags']), 3)
+
+
+class RecipeUpdateTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe(self.user, 'большой', ingredients=40)
+
+    def patch(self, ingredients, tags):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {'ingredients': ingredients, 'tags': tags},
+                format='json'
+            )
+        return response, queries
+
+    def test_update_writes_only_the_diff(self):
+        ingredients = [
+            {'id': ingredient.id, 'amount': 10}
+            for ingredient in self.ingredients[1:40]
+        ]
+        ingredients[0]['amount'] = 25
+        ingredients.append({'id': self.ingredients[45].id, 'amount': 5})
+        response, queries = self.patch(
+            ingredients, [tag.id for tag in self.tags[:2]]
+        )
+        self.assertEqual(response.status_code, 200)
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')
+        ]
+        self.assertLessEqual(len(writes), 6)
+        self.assertLessEqual(len(queries), 25)
+        amounts = dict(
+            self.recipe.recipeingredient_set.values_list(
+                'ingredient_id', 'amount'
+            )
+        )
+        self.assertEqual(len(amounts), 40)
+        self.assertEqual(amounts[self.ingredients[1].id], 25)
+        self.assertNotIn(self.ingredients[0].id, amounts)
+        self.assertEqual(amounts[self.ingredients[45].id], 5)
+        self.assertEqual(
+            set(self.recipe.tags.values_list('id', flat=True)),
+            {tag.id for tag in self.tags[:2]}
+        )
+
+    def test_unknown_ids_are_rejected(self):
+        response, _ = self.patch(
+            [{'id': 999999, 'amount': 1}], [self.tags[0].id]
+        )
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.patch(
+            [{'id': self.ingredients[0].id, 'amount': 1}], [999999]
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.db import connections
+from django.test import override_settings
+
+from api.tests.base import ApiTestCase
+from foodgram import routers
+from main.constants import PRIMARY_STICKY_COOKIE
+from main.models import Tag
+
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(ApiTestCase):
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        with connections[REPLICA].schema_editor() as editor:
+            editor.create_model(Tag)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.directory)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Tag.objects.using(REPLICA).create(name='с реплики', slug='replica')
+        cls.recipe = cls.create_recipe(cls.create_user('cook'), 'рецепт')
+
+    def tag_slugs(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        return {tag['slug'] for tag in response.json()}
+
+    def test_safe_reads_go_to_replica(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.tag_slugs(), {'replica'})
+
+    def test_reads_after_write_stick_to_primary(self):
+        response = self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PRIMARY_STICKY_COOKIE, response.cookies)
+        caches['api'].clear()
+        self.assertEqual(
+            self.tag_slugs(), {tag.slug for tag in self.tags}
+        )
+        del self.client.cookies[PRIMARY_STICKY_COOKIE]
+        caches['api'].clear()
+        self.assertEqual(self.tag_slugs(), {'replica'})
+
+    def test_reads_inside_a_write_use_primary(self):
+        routers.reset()
+        routers.state.replica = REPLICA
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Tag), REPLICA)
+        self.assertEqual(router.db_for_write(Tag), 'default')
+        self.assertEqual(router.db_for_read(Tag), 'default')
+        routers.reset()
+
+    def test_replicas_are_not_migrated(self):
+        router = routers.ReplicaRouter()
+        self.assertIs(router.allow_migrate(REPLICA, 'main'), False)
+        self.assertIsNone(router.allow_migrate('default', 'main'))
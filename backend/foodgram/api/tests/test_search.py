@@ -0,0 +1,71 @@
+from django.test import TestCase
+
+from api.search import ingredient_index
+from main.models import Ingredient
+
+
+class IngredientIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in (
+            'макароны рисони',
+            'Арахис в рисовой глазури',
+            'РИСОВАЯ бумага',
+            'рис',
+            'Рисовый уксус',
+            'бурый рис',
+            'соль',
+        ):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        ingredient_index.invalidate()
+
+    def names(self, query, **kwargs):
+        return [
+            item['name']
+            for item in ingredient_index.search(query, **kwargs)
+        ]
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(
+            self.names('рисо'),
+            [
+                'РИСОВАЯ бумага',
+                'Рисовый уксус',
+                'Арахис в рисовой глазури',
+                'макароны рисони'
+            ]
+        )
+
+    def test_substring_fallback(self):
+        self.assertEqual(
+            self.names('рис'),
+            [
+                'рис',
+                'РИСОВАЯ бумага',
+                'Рисовый уксус',
+                'Арахис в рисовой глазури',
+                'бурый рис',
+                'макароны рисони'
+            ]
+        )
+
+    def test_short_query_scans_all_names(self):
+        self.assertEqual(self.names('ль'), ['соль'])
+
+    def test_result_is_capped(self):
+        self.assertEqual(
+            self.names('рис', limit=2), ['рис', 'РИСОВАЯ бумага']
+        )
+        self.assertEqual(len(self.names('и', limit=3)), 3)
+
+    def test_empty_query_returns_all_sorted(self):
+        self.assertEqual(
+            self.names(' ')[:2], ['Арахис в рисовой глазури', 'бурый рис']
+        )
+
+    def test_index_follows_saves(self):
+        Ingredient.objects.create(name='Рисовая мука', measurement_unit='г')
+        self.assertIn('Рисовая мука', self.names('рисовая'))
@@ -0,0 +1,48 @@
+from api.tests.base import ApiTestCase
+
+
+class ShoppingCartExportTests(ApiTestCase):
+
+    def test_anonymous_export_is_rejected(self):
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_export_formats(self):
+        self.create_recipes(2)
+        for export_format in ('txt', 'csv', 'pdf'):
+            with self.subTest(export_format=export_format):
+                response = self.client.get(
+                    '/api/recipes/download_shopping_cart/'
+                    f'?format={export_format}'
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(b''.join(response.streaming_content))
+
+
+class ShoppingCartSummaryTests(ApiTestCase):
+
+    def test_anonymous_summary_is_rejected(self):
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/recipes/shopping_cart/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_summary_follows_cart_changes(self):
+        author = self.create_user('cook')
+        first = self.create_recipe(author, 'первый')
+        second = self.create_recipe(author, 'второй')
+        for recipe in (first, second):
+            response = self.client.post(
+                f'/api/recipes/{recipe.id}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, 201)
+        response = self.client.get('/api/recipes/shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['amount'] for item in response.data], [20, 20, 20]
+        )
+        self.client.delete(f'/api/recipes/{first.id}/shopping_cart/')
+        response = self.client.get('/api/recipes/shopping_cart/')
+        self.assertEqual(
+            [item['amount'] for item in response.data], [10, 10, 10]
+        )
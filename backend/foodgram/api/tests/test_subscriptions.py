@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import ApiTestCase
+
+
+class SubscriptionsQueryTests(ApiTestCase):
+
+    def get_subscriptions(self, url='/api/users/subscriptions/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data['results']
+
+    def test_empty_subscriptions(self):
+        _, results = self.get_subscriptions()
+        self.assertEqual(results, [])
+
+    def test_query_count_does_not_grow_with_authors(self):
+        self.create_recipes(3)
+        self.get_subscriptions()
+        few, results = self.get_subscriptions()
+        self.assertEqual(len(results), 1)
+        for _ in range(4):
+            self.create_recipes(3)
+        many, results = self.get_subscriptions()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(few, many)
+
+    def test_recipes_limit_and_count(self):
+        recipes = self.create_recipes(4)
+        _, results = self.get_subscriptions(
+            '/api/users/subscriptions/?recipes_limit=2'
+        )
+        self.assertEqual(results[0]['recipes_count'], 4)
+        self.assertEqual(
+            [recipe['id'] for recipe in results[0]['recipes']],
+            [recipe.id for recipe in recipes[:2]]
+        )
+
+
+class SubscribeQueryTests(ApiTestCase):
+
+    def subscribe(self, author):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    def create_author(self, name, recipes):
+        author = self.create_user(name)
+        for number in range(recipes):
+            recipe = self.create_recipe(author, f'рецепт {number}')
+            recipe.image = f'recipes/{recipe.pk}.png'
+            recipe.save(update_fields=['image'])
+        return author
+
+    def test_query_count_does_not_grow_with_recipes(self):
+        few = self.subscribe(self.create_author('few', 1))
+        many = self.subscribe(self.create_author('many', 6))
+        self.assertEqual(few, many)
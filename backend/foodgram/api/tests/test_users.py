@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import ApiTestCase
+from main.models import ImageJob
+
+
+class UserListQueryTests(ApiTestCase):
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/users/?limit=20')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def create_users(self, count):
+        for number in range(count):
+            user = self.create_user(f'user{self.user_count}')
+            self.user_count += 1
+            user.avatar = f'users/{user.pk}.png'
+            user.save(update_fields=['avatar'])
+            ImageJob.objects.create(
+                content_object=user,
+                field='avatar',
+                source=f'users/{user.pk}.png',
+                status=ImageJob.DONE,
+                extension='webp'
+            )
+
+    def assert_constant_queries(self):
+        self.user_count = 0
+        self.create_users(2)
+        self.count_queries()
+        few = self.count_queries()
+        self.create_users(8)
+        self.assertEqual(few, self.count_queries())
+
+    def test_anonymous_list_query_count_does_not_grow(self):
+        self.client.force_authenticate(None)
+        self.assert_constant_queries()
+
+    def test_list_query_count_does_not_grow(self):
+        self.assert_constant_queries()
+
+    def test_list_marks_subscriptions(self):
+        author = self.create_user('author')
+        self.client.post(f'/api/users/{author.id}/subscribe/')
+        response = self.client.get('/api/users/?limit=20')
+        subscribed = {
+            user['id']: user['is_subscribed']
+            for user in response.data['results']
+        }
+        self.assertTrue(subscribed[author.id])
+        self.assertFalse(subscribed[self.user.id])
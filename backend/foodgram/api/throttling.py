@@ -0,0 +1,68 @@
+import threading
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from api.cache import LocalTTLCache
+
+
+class TokenBucket:
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.stamp) * self.rate
+        )
+        self.stamp = now
+
+    def wait(self):
+        return max(0, (1 - self.tokens) / self.rate)
+
+
+class LoginRateThrottle(BaseThrottle):
+    lock = threading.Lock()
+    buckets = LocalTTLCache(
+        settings.LOGIN_THROTTLE_SIZE,
+        settings.LOGIN_THROTTLE_BURST / settings.LOGIN_THROTTLE_RATE
+    )
+
+    def get_keys(self, request):
+        keys = [f'ip:{self.get_ident(request)}']
+        data = request.data
+        email = data.get('email') if isinstance(data, Mapping) else None
+        if isinstance(email, str) and email:
+            keys.append(f'email:{email.strip().lower()}')
+        return keys
+
+    def get_bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(
+                settings.LOGIN_THROTTLE_BURST,
+                settings.LOGIN_THROTTLE_RATE
+            )
+        self.buckets.set(key, bucket)
+        bucket.refill()
+        return bucket
+
+    def allow_request(self, request, view):
+        with self.lock:
+            buckets = [self.get_bucket(key) for key in self.get_keys(request)]
+            self.delay = max(bucket.wait() for bucket in buckets)
+            if self.delay:
+                return False
+            for bucket in buckets:
+                bucket.tokens -= 1
+            return True
+
+    def wait(self):
+        return self.delay
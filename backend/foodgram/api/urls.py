@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 from api.views import (
     FavoriteViewSet,
     IngredientViewSet,
+    metrics,
     ProfileViewSet,
     RecipeViewSet,
     RedirectShortUrl,
@@ -25,10 +26,18 @@ router.register('users', ProfileViewSet)
 
 
 urlpatterns = [
+    path('metrics', metrics),
     path(
         SHORT_URL_SPLIT + '<slug:slug>/',
         RedirectShortUrl
     ),
+    path(
+        'users/subscribe/batch/',
+        SubscribeViewSet.as_view({
+            'post': 'batch_create',
+            'delete': 'batch_destroy'
+        })
+    ),
     path(
         'users/<int:pk>/subscribe/',
         SubscribeViewSet.as_view({
@@ -40,6 +49,13 @@ urlpatterns = [
         'users/subscriptions/',
         SubscribeViewSet.as_view({'get': 'list', })
     ),
+    path(
+        'recipes/favorite/batch/',
+        FavoriteViewSet.as_view({
+            'post': 'batch_create',
+            'delete': 'batch_destroy'
+        })
+    ),
     path(
         'recipes/<int:pk>/favorite/',
         FavoriteViewSet.as_view({
@@ -51,6 +67,17 @@ urlpatterns = [
         'recipes/download_shopping_cart/',
         ShopListViewSet.as_view({'get': 'list', })
     ),
+    path(
+        'recipes/shopping_cart/',
+        ShopListViewSet.as_view({'get': 'summary', })
+    ),
+    path(
+        'recipes/shopping_cart/batch/',
+        ShopListViewSet.as_view({
+            'post': 'batch_create',
+            'delete': 'batch_destroy'
+        })
+    ),
     path(
         'recipes/<int:pk>/shopping_cart/',
         ShopListViewSet.as_view({
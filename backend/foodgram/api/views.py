@@ -1,14 +1,27 @@
-import io
-
-from django.db.models import Sum
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Exists,
+    F,
+    OuterRef,
+    Value,
+    Window,
+    prefetch_related_objects
+)
+from django.db.models.functions import RowNumber
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import FileResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from rest_framework import permissions, status, viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from api.batch import BatchRelationMixin
+from api.cache import CachedResponseMixin
+from api.exports import EXPORT_FORMATS, shopping_cart_ingredients
 from api.serializers import (
     FavoriteSerializer,
     IngredientSerializer,
@@ -17,26 +30,47 @@ from api.serializers import (
     RecipeCreateSerializer,
     RecipeSerializer,
     RecipeShopSerializer,
+    ShoppingCartItemSerializer,
     SubscribeSerializer,
     SignupSerializer,
     TagSerializer,
     TokenSerializer
 )
-from api.filter import IngredientSearchFilter, RecipeFilter
-from api.pagination import PagePagination
+from api.filter import RecipeFilter
+from api.pagination import (
+    ApproximateCountPagination,
+    FeedPagination,
+    RecipeCursorPagination
+)
 from api.permissions import IsAuthenticatedAndOwner
+from api.search import ingredient_index
+from api.throttling import LoginRateThrottle
+from foodgram.metrics import render as render_metrics
+from foodgram.routers import ReplicaReadMixin, replica_reads
+from main.cart import (
+    add_recipe,
+    add_recipes,
+    remove_recipe,
+    remove_recipe_from_carts,
+    remove_recipes
+)
+from main.counters import change_counter, change_counters
+from main.feed import backfill, prune, refill
 from main.constants import (
     CONTENT_DISPOSITION,
+    INGREDIENTS_CACHE,
     RECIPE_URL,
-    START_URL
+    SHORT_URL_CACHE_SIZE,
+    START_URL,
+    TAGS_CACHE
 )
 from main.models import (
     Follow,
     Ingredient,
     Recipe,
     RecipeFavorite,
-    RecipeIngredient,
     RecipeShop,
+    ShoppingCartItem,
     ShortUrl,
     Tag,
     User
@@ -44,12 +78,12 @@ from main.models import (
 
 
 @action(methods=['get', 'post', 'patch', 'delete'], detail=True)
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     filter_backends = [DjangoFilterBackend, ]
     filter_class = RecipeFilter
-    pagination_class = PagePagination
+    pagination_class = ApproximateCountPagination
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -60,27 +94,69 @@ class RecipeViewSet(viewsets.ModelViewSet):
             context.update({'id': self.kwargs.get('pk')})
         return context
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if RecipeCursorPagination.requested(self.request):
+                self._paginator = RecipeCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return RecipeCreateSerializer
         return RecipeSerializer
 
     def get_queryset(self):
-        if self.request.GET.get('is_favorited'):
-            return Recipe.objects.filter(
-                is_favorited=get_object_or_404(
-                    User,
-                    username=self.request.user
-                )
-            )
-        elif self.request.GET.get('is_in_shopping_cart'):
-            return Recipe.objects.filter(
-                is_in_shopping_cart=get_object_or_404(
-                    User,
-                    username=self.request.user
-                )
+        user = self.request.user
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            'recipeingredient_set__ingredient',
+            'image_jobs',
+            'author__image_jobs'
+        )
+        if user.is_anonymous:
+            return queryset.annotate(
+                favorited=Value(False, output_field=BooleanField()),
+                in_shopping_cart=Value(False, output_field=BooleanField()),
+                author_subscribed=Value(False, output_field=BooleanField())
             )
-        return Recipe.objects.all()
+        return queryset.annotate(
+            favorited=Exists(RecipeFavorite.objects.filter(
+                recipe=OuterRef('pk'),
+                user=user
+            )),
+            in_shopping_cart=Exists(RecipeShop.objects.filter(
+                recipe=OuterRef('pk'),
+                user=user
+            )),
+            author_subscribed=Exists(Follow.objects.filter(
+                author=OuterRef('author'),
+                user=user
+            ))
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        remove_recipe_from_carts(instance)
+        instance.delete()
+        change_counter(User, instance.author_id, 'recipes_count', -1)
+
+    @action(
+        methods=('GET',),
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def feed(self, request):
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(
+            self.get_queryset(), request, self
+        )
+        serializer = RecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
 
     @action(
         methods=('GET',),
@@ -89,49 +165,75 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='get-link'
     )
     def get_link(self, request, pk):
-        if len(ShortUrl.objects.filter(recipe_id=pk)):
-            short_url = ShortUrl.objects.get(recipe_id=pk).short_url
-        else:
-            short_url = ShortUrl.generate()
-            ShortUrl.objects.create(
-                recipe_id=pk,
-                short_url=short_url
-            )
-        short_url = START_URL + short_url
+        short_url, _ = ShortUrl.objects.get_or_create(
+            recipe_id=pk,
+            defaults={'short_url': ShortUrl.generate(pk)}
+        )
         return Response(
-            {'short-link': short_url},
+            {'short-link': START_URL + short_url.short_url},
             status=status.HTTP_201_CREATED
         )
 
 
+@lru_cache(maxsize=SHORT_URL_CACHE_SIZE)
+def short_url_recipe(short_url):
+    return ShortUrl.objects.values_list(
+        'recipe_id', flat=True
+    ).get(short_url=short_url)
+
+
+def metrics(request):
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @action(
     methods=('GET',),
     detail=True,
     permission_classes=(permissions.AllowAny,),
 )
+@replica_reads
 def RedirectShortUrl(request, slug):
-    recipe_id = get_object_or_404(
-        ShortUrl,
-        short_url=ShortUrl.find_slug(slug)
-    )
-    return redirect(RECIPE_URL + str(recipe_id.recipe_id))
+    try:
+        recipe_id = short_url_recipe(ShortUrl.find_slug(slug))
+    except ShortUrl.DoesNotExist:
+        raise Http404
+    return redirect(RECIPE_URL + str(recipe_id))
 
 
 @action(methods=['get', ], detail=True)
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = [IngredientSearchFilter, ]
-    search_fields = ('name',)
     pagination_class = None
+    cache_namespace = INGREDIENTS_CACHE
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: Response(
+                ingredient_index.search(request.query_params.get('name', ''))
+            )
+        )
 
 
 @action(methods=['get', ], detail=True)
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet
+):
     permission_classes = (permissions.AllowAny,)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    cache_namespace = TAGS_CACHE
 
 
 @action(
@@ -140,7 +242,7 @@ class TagViewSet(viewsets.ModelViewSet):
 )
 class ProfileViewSet(viewsets.ModelViewSet):
     permission_classes = (permissions.AllowAny,)
-    queryset = User.objects.all()
+    queryset = User.objects.prefetch_related('image_jobs')
     serializer_class = ProfileSerializer
     filter_backends = [DjangoFilterBackend, ]
 
@@ -149,6 +251,18 @@ class ProfileViewSet(viewsets.ModelViewSet):
             return SignupSerializer
         return ProfileSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            subscribed=Exists(Follow.objects.filter(
+                author=OuterRef('pk'),
+                user=user
+            ))
+        )
+
     @action(
         methods=['get', ],
         detail=False,
@@ -177,8 +291,8 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 {'avatar': 'change success.'},
                 status=status.HTTP_200_OK
             )
-        user.avatar.delete()
-        user.save()
+        user.avatar.delete(save=False)
+        user.save(update_fields=['avatar'])
         return Response(
             {'avatar': 'delete success.'},
             status=status.HTTP_204_NO_CONTENT
@@ -195,23 +309,31 @@ class ProfileViewSet(viewsets.ModelViewSet):
 
 
 @action(methods=['get', 'post', 'delete', ], detail=True,)
-class SubscribeViewSet(viewsets.ModelViewSet):
+class SubscribeViewSet(BatchRelationMixin, viewsets.ModelViewSet):
     serializer_class = SubscribeSerializer
+    batch_model = Follow
+    batch_target = User
+    batch_field = 'author_id'
+    batch_exists_error = 'Вы уже подписаны на автора.'
+    batch_missing_error = 'Вы не подписаны на автора.'
+    batch_not_found_error = 'Автор не найден.'
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        if self.request.data.get('recipes_limit'):
-            recipes_limit = self.request.data['recipes_limit']
-        else:
-            recipes_limit = None
         context.update({
             'request': self.request,
-            'recipes_limit': recipes_limit,
+            'recipes_limit': self.get_recipes_limit(),
         })
         if self.kwargs.get('pk'):
             context.update({'pk': self.kwargs.get('pk')})
         return context
 
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            return int(recipes_limit)
+        return None
+
     def get_follow(self):
         return Follow.objects.filter(user=self.request.user)
 
@@ -219,13 +341,66 @@ class SubscribeViewSet(viewsets.ModelViewSet):
         if self.action in ('create',):
             return User.objects.all()
         return User.objects.filter(
-            following__in=self.get_follow()
-        ).distinct()
+            following__user=self.request.user
+        ).order_by('id')
+
+    def get_recipes_preview(self, authors):
+        if not authors:
+            return authors
+        recipes = Recipe.objects.filter(author__in=authors)
+        limit = self.get_recipes_limit()
+        if limit is not None:
+            ranked = recipes.annotate(
+                recipe_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('author_id')],
+                    order_by=[F('pub_date').asc(), F('id').asc()]
+                )
+            )
+            sql, params = ranked.query.sql_with_params()
+            recipes = Recipe.objects.raw(
+                'SELECT * FROM ({}) AS ranked '
+                'WHERE ranked.recipe_rank <= %s'.format(sql),
+                params + (limit,)
+            )
+        recipes = list(recipes)
+        prefetch_related_objects(recipes, 'image_jobs')
+        preview = {author.id: [] for author in authors}
+        for recipe in recipes:
+            preview[recipe.author_id].append(recipe)
+        for author in authors:
+            author.recipes_preview = preview[author.id]
+        return authors
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        authors = self.get_recipes_preview(
+            page if page is not None else list(queryset)
+        )
+        serializer = self.get_serializer(authors, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def batch_added(self, user, ids):
+        change_counters(User, ids, 'followers_count', 1)
+        for author in User.objects.filter(id__in=ids):
+            backfill(user, author)
+
+    def batch_removed(self, user, ids):
+        change_counters(User, ids, 'followers_count', -1)
+        prune(user, ids)
+        refill(ids)
 
     def destroy(self, request, *args, **kwargs):
         author = get_object_or_404(User, id=self.kwargs.get('pk'))
         user = request.user
-        get_object_or_404(Follow, author=author, user=user).delete()
+        with transaction.atomic():
+            get_object_or_404(Follow, author=author, user=user).delete()
+            change_counter(User, author.id, 'followers_count', -1)
+            prune(user, [author.id])
+            refill([author.id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -235,7 +410,8 @@ class TokenViewSet(viewsets.ModelViewSet):
 
     @action(
         methods=['post', ], detail=False, url_path='login',
-        permission_classes=[permissions.AllowAny]
+        permission_classes=[permissions.AllowAny],
+        throttle_classes=[LoginRateThrottle]
     )
     def login(self, request):
         serializer = TokenSerializer(
@@ -262,9 +438,15 @@ class TokenViewSet(viewsets.ModelViewSet):
 
 
 @action(methods=['post', 'delete', ], detail=True)
-class FavoriteViewSet(viewsets.ModelViewSet):
+class FavoriteViewSet(BatchRelationMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = FavoriteSerializer
+    batch_model = RecipeFavorite
+    batch_target = Recipe
+    batch_field = 'recipe_id'
+    batch_exists_error = 'Рецепт уже в избранном.'
+    batch_missing_error = 'Рецепта нет в избранном.'
+    batch_not_found_error = 'Рецепт не найден.'
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -275,10 +457,20 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             context.update({'pk': self.kwargs.get('pk')})
         return context
 
+    def batch_added(self, user, ids):
+        change_counters(Recipe, ids, 'favorites_count', 1)
+
+    def batch_removed(self, user, ids):
+        change_counters(Recipe, ids, 'favorites_count', -1)
+
     def destroy(self, request, *args, **kwargs):
         recipe = get_object_or_404(Recipe, id=self.kwargs.get('pk'))
         user = self.request.user
-        get_object_or_404(RecipeFavorite, recipe=recipe, user=user).delete()
+        with transaction.atomic():
+            get_object_or_404(
+                RecipeFavorite, recipe=recipe, user=user
+            ).delete()
+            change_counter(Recipe, recipe.id, 'favorites_count', -1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -286,9 +478,16 @@ class FavoriteViewSet(viewsets.ModelViewSet):
     methods=['get', 'post', 'delete', ],
     permission_classes=(IsAuthenticatedAndOwner,),
     detail=True)
-class ShopListViewSet(viewsets.ModelViewSet):
+class ShopListViewSet(BatchRelationMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeShopSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    batch_model = RecipeShop
+    batch_target = Recipe
+    batch_field = 'recipe_id'
+    batch_exists_error = 'Рецепт уже добавлен!'
+    batch_missing_error = 'Рецепта нет в корзине.'
+    batch_not_found_error = 'Рецепт не найден.'
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -299,27 +498,6 @@ class ShopListViewSet(viewsets.ModelViewSet):
             context.update({'pk': self.kwargs.get('pk')})
         return context
 
-    @staticmethod
-    def shop_text(user):
-        ingredient_list = RecipeIngredient.objects.filter(
-            recipe__recipe_shop__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(count=Sum('amount'))
-        text = ['Корзина покупок:']
-        for index, recipe_ingredient in enumerate(ingredient_list):
-            name = recipe_ingredient['ingredient__name']
-            measurement_unit = recipe_ingredient[
-                'ingredient__measurement_unit'
-            ]
-            count = recipe_ingredient['count']
-            ingredient = (
-                f'\n{index + 1}. {name} -'
-                f'{count} {measurement_unit}.'
-            )
-            text.append(ingredient)
-
     def create(self, request, pk, *args, **kwargs):
         if RecipeShop.objects.filter(
             user=self.request.user, recipe__id=pk
@@ -329,23 +507,53 @@ class ShopListViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         recipe = get_object_or_404(Recipe, id=pk)
-        RecipeShop.objects.create(user=self.request.user, recipe=recipe)
+        with transaction.atomic():
+            RecipeShop.objects.create(user=self.request.user, recipe=recipe)
+            add_recipe(self.request.user, recipe)
+            change_counter(Recipe, recipe.id, 'in_carts_count', 1)
         serializer = RecipeShopSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def batch_added(self, user, ids):
+        add_recipes(user, ids)
+        change_counters(Recipe, ids, 'in_carts_count', 1)
+
+    def batch_removed(self, user, ids):
+        remove_recipes(user, ids)
+        change_counters(Recipe, ids, 'in_carts_count', -1)
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
     def list(self, request, *args, **kwargs):
-        buffer = io.StringIO()
-        buffer.write(
-            self.shop_text(self, request.user)
+        export_format = request.query_params.get('format', 'txt')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'errors': 'Доступные форматы: txt, csv, pdf.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        render, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            render(shopping_cart_ingredients(request.user)),
+            content_type=content_type
         )
-        response = FileResponse(buffer.getvalue(), content_type='text/plain')
         response['Content-Disposition'] = (
-            CONTENT_DISPOSITION
+            CONTENT_DISPOSITION.format(export_format)
         )
         return response
 
     def destroy(self, request, *args, **kwargs):
         recipe = get_object_or_404(Recipe, id=self.kwargs.get('pk'))
         user = self.request.user
-        get_object_or_404(RecipeShop, recipe=recipe, user=user).delete()
+        with transaction.atomic():
+            get_object_or_404(RecipeShop, recipe=recipe, user=user).delete()
+            remove_recipe(user, recipe)
+            change_counter(Recipe, recipe.id, 'in_carts_count', -1)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def summary(self, request, *args, **kwargs):
+        items = ShoppingCartItem.objects.filter(
+            user=request.user
+        ).select_related('ingredient')
+        serializer = ShoppingCartItemSerializer(items, many=True)
+        return Response(serializer.data)
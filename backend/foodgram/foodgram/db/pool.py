@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+
+from psycopg2 import Error, extensions
+
+
+class PoolTimeout(Error):
+    pass
+
+
+def ping(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, max_size, max_overflow=0, timeout=30,
+                 check=False):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.check = check
+        self.idle = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection = self.reserve(deadline)
+            if connection is None:
+                break
+            if not self.check or ping(connection):
+                return connection
+            self.discard(connection)
+        try:
+            return self.connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+    def reserve(self, deadline):
+        with self.condition:
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size + self.max_overflow:
+                    self.size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f'Нет свободных соединений с БД за {self.timeout} с.'
+                    )
+                self.condition.wait(remaining)
+
+    def release(self, connection):
+        try:
+            status = connection.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return self.discard(connection)
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Error:
+            return self.discard(connection)
+        with self.condition:
+            if len(self.idle) < self.max_size:
+                self.idle.append(connection)
+                self.condition.notify()
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            connections, self.idle = list(self.idle), deque()
+        for connection in connections:
+            self.discard(connection)
@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+from functools import partial
+
+from django.db.backends.postgresql import base
+
+from foodgram.db.pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_pool(self, conn_params=None):
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('MAX_SIZE'):
+            return None
+        key = (os.getpid(), self.alias)
+        with pools_lock:
+            if key not in pools and conn_params is not None:
+                pools[key] = ConnectionPool(
+                    partial(base.Database.connect, **conn_params),
+                    options['MAX_SIZE'],
+                    options.get('MAX_OVERFLOW', 0),
+                    options.get('TIMEOUT', 30),
+                    check=self.health_checks
+                )
+            return pools.get(key)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.acquire()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+        if self.get_pool() is not None:
+            self.close_at = time.monotonic()
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_checks
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
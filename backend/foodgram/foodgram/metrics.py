@@ -0,0 +1,273 @@
+import fcntl
+import glob
+import json
+import os
+import resource
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+DEAD_WORKERS_FILE = 'dead.json'
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.flushed_at = 0
+        self.pid = None
+        self.started = None
+
+    def process_key(self):
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.started = time.time_ns()
+        return f'{self.pid}-{self.started}'
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, labels_key(labels or {}))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': [0] * len(LATENCY_BUCKETS),
+                    'sum': 0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def gauges(self):
+        pid = str(os.getpid())
+        open_connections = sum(
+            connection.connection is not None
+            for connection in connections.all()
+        )
+        return [
+            ('foodgram_worker_max_rss_bytes', {'pid': pid},
+             resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024),
+            ('foodgram_worker_rss_bytes', {'pid': pid}, current_rss()),
+            ('foodgram_db_connections_open', {'pid': pid}, open_connections),
+        ]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'started': self.started,
+                'counters': [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, dict(labels), dict(
+                        histogram, buckets=list(histogram['buckets'])
+                    )]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+                'gauges': [
+                    [name, labels, value]
+                    for name, labels, value in self.gauges()
+                ],
+            }
+
+    def flush(self, force=False):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+            not force
+            and now - self.flushed_at < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.process_key()}.json')
+        write_json(path, self.snapshot())
+
+
+registry = Registry()
+
+
+def write_json(path, data):
+    with open(path + '.tmp', 'w', encoding='utf-8') as metrics_file:
+        json.dump(data, metrics_file)
+    os.replace(path + '.tmp', path)
+
+
+def read_json(path):
+    try:
+        with open(path, encoding='utf-8') as metrics_file:
+            return json.load(metrics_file)
+    except (OSError, ValueError):
+        return None
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    registry.inc(
+        'foodgram_db_connections_opened_total',
+        {'alias': connection.alias}
+    )
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(counters, histograms, snapshot):
+    for name, labels, value in snapshot['counters']:
+        key = (name, labels_key(labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, histogram in snapshot['histograms']:
+        key = (name, labels_key(labels))
+        total = histograms.setdefault(key, {
+            'buckets': [0] * len(LATENCY_BUCKETS),
+            'sum': 0,
+            'count': 0,
+        })
+        total['buckets'] = [
+            left + right for left, right
+            in zip(total['buckets'], histogram['buckets'])
+        ]
+        total['sum'] += histogram['sum']
+        total['count'] += histogram['count']
+
+
+def fold_dead_workers(directory):
+    dead_path = os.path.join(directory, DEAD_WORKERS_FILE)
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            if path == dead_path:
+                continue
+            snapshot = read_json(path)
+            if snapshot is not None and not process_alive(snapshot['pid']):
+                dead.append((path, snapshot))
+        if not dead:
+            return
+        counters, histograms = {}, {}
+        merge(counters, histograms, read_json(dead_path) or {
+            'counters': [], 'histograms': []
+        })
+        for path, snapshot in dead:
+            merge(counters, histograms, snapshot)
+        write_json(dead_path, {
+            'pid': None,
+            'counters': [
+                [name, dict(labels), value]
+                for (name, labels), value in counters.items()
+            ],
+            'histograms': [
+                [name, dict(labels), histogram]
+                for (name, labels), histogram in histograms.items()
+            ],
+            'gauges': [],
+        })
+        for path, snapshot in dead:
+            os.remove(path)
+
+
+def load_snapshots():
+    directory = settings.METRICS_DIR
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(force=True)
+    fold_dead_workers(directory)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        snapshot = read_json(path)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    return sorted(snapshots, key=lambda snapshot: snapshot.get('started') or 0)
+
+
+def collect():
+    counters, histograms, gauges = {}, {}, {}
+    for snapshot in load_snapshots():
+        merge(counters, histograms, snapshot)
+        if snapshot['pid'] and process_alive(snapshot['pid']):
+            for name, labels, value in snapshot['gauges']:
+                gauges[(name, labels_key(labels))] = value
+    return counters, histograms, gauges
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for key, value in labels
+    ) + '}'
+
+
+def render():
+    counters, histograms, gauges = collect()
+    lines = []
+    for metric_type, metrics in (('counter', counters), ('gauge', gauges)):
+        for name in sorted({name for name, _ in metrics}):
+            lines.append(f'# TYPE {name} {metric_type}')
+            for (metric, labels), value in sorted(metrics.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                bucket_labels = labels + (('le', bound),)
+                lines.append(
+                    f'{name}_bucket{format_labels(bucket_labels)} {count}'
+                )
+            bucket_labels = labels + (('le', '+Inf'),)
+            lines.append(
+                f'{name}_bucket{format_labels(bucket_labels)} '
+                f'{histogram["count"]}'
+            )
+            lines.append(
+                f'{name}_sum{format_labels(labels)} {histogram["sum"]}'
+            )
+            lines.append(
+                f'{name}_count{format_labels(labels)} {histogram["count"]}'
+            )
+    return '\n'.join(lines) + '\n'
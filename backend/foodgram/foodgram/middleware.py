@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import ListSerializer, Serializer
+
+from foodgram import routers
+from foodgram.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.serializer_time = 0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def timed_data(data):
+    def wrapper(self):
+        stats = getattr(local, 'stats', None)
+        if stats is None:
+            return data(self)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data(self)
+        finally:
+            stats.serializer_depth -= 1
+            if not stats.serializer_depth:
+                stats.serializer_time += time.perf_counter() - start
+    return property(wrapper)
+
+
+def instrument_serializers():
+    for serializer in (Serializer, ListSerializer):
+        if not getattr(serializer.data.fget, 'instrumented', False):
+            serializer.data = timed_data(serializer.data.fget)
+            serializer.data.fget.instrumented = True
+
+
+def view_name(view_func, request):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryInstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        local.stats = stats
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            local.stats = None
+        duration = time.perf_counter() - start
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.2f};'
+            f'desc="{stats.queries} queries", '
+            f'serializer;dur={stats.serializer_time * 1000:.2f}, '
+            f'total;dur={duration * 1000:.2f}, '
+            f'size;desc="{size} bytes"'
+        )
+        name = getattr(request, 'view_name', None)
+        self.record(
+            name or 'unresolved', request, response, duration, stats, size
+        )
+        self.check_budget(name, stats)
+        return response
+
+    def record(self, name, request, response, duration, stats, size):
+        registry.observe(
+            'foodgram_http_request_duration_seconds',
+            {
+                'view': name,
+                'method': request.method,
+                'status': response.status_code
+            },
+            duration
+        )
+        labels = {'view': name}
+        registry.inc('foodgram_db_queries_total', labels, stats.queries)
+        registry.inc('foodgram_db_query_seconds_total', labels, stats.db_time)
+        registry.inc(
+            'foodgram_serializer_seconds_total',
+            labels,
+            stats.serializer_time
+        )
+        registry.inc('foodgram_response_bytes_total', labels, size)
+        registry.flush()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = view_name(view_func, request)
+
+    def check_budget(self, name, stats):
+        budget = settings.QUERY_BUDGETS.get(name)
+        if budget is None or stats.queries <= budget:
+            return
+        message = (
+            f'{name}: {stats.queries} запросов к БД при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        try:
+            response = self.get_response(request)
+            if routers.state.wrote:
+                routers.mark_write(request, response)
+        finally:
+            routers.reset()
+        return response
@@ -0,0 +1,99 @@
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+from main.constants import (
+    API_CACHE_ALIAS,
+    PRIMARY_STICKY_COOKIE,
+    PRIMARY_STICKY_KEY
+)
+
+state = threading.local()
+
+
+def reset():
+    state.replica = None
+    state.wrote = False
+
+
+def sticky_key(user):
+    return PRIMARY_STICKY_KEY.format(user.pk)
+
+
+def recently_wrote(request):
+    if request.COOKIES.get(PRIMARY_STICKY_COOKIE):
+        return True
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return False
+    return caches[API_CACHE_ALIAS].get(sticky_key(user)) is not None
+
+
+def mark_write(request, response):
+    if not settings.DATABASE_REPLICAS:
+        return
+    response.set_cookie(
+        PRIMARY_STICKY_COOKIE,
+        '1',
+        max_age=settings.READ_REPLICA_STICKY_SECONDS,
+        httponly=True,
+        samesite='Lax'
+    )
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return
+    caches[API_CACHE_ALIAS].set(
+        sticky_key(user), True, settings.READ_REPLICA_STICKY_SECONDS
+    )
+
+
+def use_replica(request):
+    replicas = settings.DATABASE_REPLICAS
+    if (
+        replicas
+        and request.method in SAFE_METHODS
+        and not recently_wrote(request)
+    ):
+        state.replica = random.choice(replicas)
+
+
+def replica_reads(view_func):
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        use_replica(request)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_replica(request)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if getattr(state, 'wrote', False):
+            return 'default'
+        return getattr(state, 'replica', None) or 'default'
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
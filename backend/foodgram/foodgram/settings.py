@@ -10,6 +10,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = os.getenv('SECRET_KEY', get_random_secret_key())
 
+SHORT_URL_KEY = os.getenv('SHORT_URL_KEY', default='foodgram-short-url')
+
 DEBUG = False
 
 ALLOWED_HOSTS = [
@@ -35,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,10 +45,31 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
 
+QUERY_BUDGETS = {
+    'RecipeViewSet.list': 10,
+    'RecipeViewSet.retrieve': 10,
+    'SubscribeViewSet.list': 10,
+    'IngredientViewSet.list': 3,
+    'TagViewSet.list': 3,
+    'ShopListViewSet.list': 5,
+}
+
+QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE', default='') == 'True'
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default='2'))
+
+METRICS_DIR = os.getenv('METRICS_DIR', default='')
+
+METRICS_FLUSH_INTERVAL = float(os.getenv(
+    'METRICS_FLUSH_INTERVAL',
+    default='1'
+))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -69,7 +93,7 @@ DATABASES = {
     'default': {
         'ENGINE': os.getenv(
             'DB_ENGINE',
-            default='django.db.backends.postgresql'
+            default='foodgram.db.postgresql'
         ),
         'NAME': os.getenv(
             'POSTGRES_DB',
@@ -90,10 +114,106 @@ DATABASES = {
         'PORT': os.getenv(
             'DB_PORT',
             default='5432'
-        )
+        ),
+        'CONN_MAX_AGE': int(os.getenv(
+            'DB_CONN_MAX_AGE',
+            default='60'
+        )),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS',
+            default='True'
+        ) == 'True',
+        'POOL': {
+            'MAX_SIZE': int(os.getenv(
+                'DB_POOL_MAX_SIZE',
+                default='0'
+            )),
+            'MAX_OVERFLOW': int(os.getenv(
+                'DB_POOL_MAX_OVERFLOW',
+                default='0'
+            )),
+            'TIMEOUT': float(os.getenv(
+                'DB_POOL_TIMEOUT',
+                default='30'
+            )),
+        },
     }
 }
 
+DATABASE_REPLICAS = []
+
+for index, host in enumerate(
+    host.strip()
+    for host in os.getenv('DB_REPLICA_HOSTS', default='').split(',')
+    if host.strip()
+):
+    DATABASES[f'replica_{index}'] = dict(
+        DATABASES['default'],
+        HOST=host,
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+
+READ_REPLICA_STICKY_SECONDS = int(os.getenv(
+    'READ_REPLICA_STICKY_SECONDS',
+    default='5'
+))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': os.getenv(
+            'API_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv(
+            'API_CACHE_LOCATION',
+            default='foodgram-api'
+        ),
+        'TIMEOUT': int(os.getenv(
+            'API_CACHE_TIMEOUT',
+            default='300'
+        )),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv(
+                'API_CACHE_MAX_ENTRIES',
+                default='1000'
+            )),
+        },
+    },
+    'api_versions': {
+        'BACKEND': os.getenv(
+            'API_VERSION_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'API_VERSION_CACHE_LOCATION',
+            default='/tmp/foodgram-api-versions'
+        ),
+        'TIMEOUT': None,
+    },
+    'tokens': {
+        'BACKEND': os.getenv(
+            'TOKEN_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'TOKEN_CACHE_LOCATION',
+            default='/tmp/foodgram-tokens'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv(
+                'TOKEN_CACHE_SIZE',
+                default='10000'
+            )),
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -111,6 +231,49 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'main.User'
 
+PASSWORD_HASHERS = [
+    hasher.strip()
+    for hasher in os.getenv(
+        'PASSWORD_HASHERS',
+        default=(
+            'foodgram.hashers.PBKDF2PasswordHasher,'
+            'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'
+        )
+    ).split(',')
+    if hasher.strip()
+]
+
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv(
+    'PASSWORD_PBKDF2_ITERATIONS',
+    default='150000'
+))
+
+PASSWORD_ARGON2_TIME_COST = int(os.getenv(
+    'PASSWORD_ARGON2_TIME_COST',
+    default='2'
+))
+
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv(
+    'PASSWORD_ARGON2_MEMORY_COST',
+    default='512'
+))
+
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv(
+    'PASSWORD_ARGON2_PARALLELISM',
+    default='2'
+))
+
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv(
+    'PASSWORD_BCRYPT_ROUNDS',
+    default='12'
+))
+
+LOGIN_THROTTLE_BURST = int(os.getenv('LOGIN_THROTTLE_BURST', default='10'))
+
+LOGIN_THROTTLE_RATE = float(os.getenv('LOGIN_THROTTLE_RATE', default='0.2'))
+
+LOGIN_THROTTLE_SIZE = int(os.getenv('LOGIN_THROTTLE_SIZE', default='10000'))
+
 USE_TZ = True
 
 LANGUAGE_CODE = 'ru-ru'
@@ -131,6 +294,17 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', default='tokens')
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv(
+    'TOKEN_CACHE_TIMEOUT',
+    default='300' if TOKEN_CACHE_ALIAS else '5'
+))
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default='10000'))
+
+NUM_PROXIES = os.getenv('NUM_PROXIES', default='')
+
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -139,11 +313,12 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': (
         'rest_framework.pagination.'
         'LimitOffsetPagination'
     ),
     'PAGE_SIZE': 6,
+    'NUM_PROXIES': int(NUM_PROXIES) if NUM_PROXIES else None,
 }
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import (Follow, Ingredient, Recipe, RecipeFavorite,
-                     RecipeIngredient, RecipeTag, Tag, User)
+from .models import (Follow, ImageJob, Ingredient, Recipe, RecipeFavorite,
+                     RecipeIngredient, RecipeTag, ShoppingCartItem, Tag,
+                     User)
 
 
 @admin.register(Tag)
@@ -21,7 +22,9 @@ class RecipeTagAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'author', 'text', 'cooking_time',)
+    list_display = (
+        'id', 'name', 'author', 'text', 'cooking_time', 'favorites_count'
+    )
     search_fields = ('author',)
     list_filter = ('name',)
     empty_value_display = '-пусто-'
@@ -60,3 +63,18 @@ class RecipeFavoriteAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'user')
     list_filter = ('recipe',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(ShoppingCartItem)
+class ShoppingCartItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'total_amount')
+    list_filter = ('user',)
+    empty_value_display = '-пусто-'
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('source', 'field', 'status', 'attempts', 'updated')
+    list_filter = ('status', 'field')
+    search_fields = ('source',)
+    empty_value_display = '-пусто-'
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from main.models import RecipeIngredient, RecipeShop, ShoppingCartItem
+
+
+def recipe_amounts(recipe):
+    return dict(
+        RecipeIngredient.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+def amounts_delta(old, new):
+    return {
+        ingredient_id: new.get(ingredient_id, 0) - old.get(ingredient_id, 0)
+        for ingredient_id in old.keys() | new.keys()
+    }
+
+
+def recipes_amounts(recipe_ids):
+    return dict(
+        RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('ingredient_id').annotate(
+            total=Sum('amount')
+        ).order_by()
+    )
+
+
+def recipe_users(recipe):
+    return list(
+        RecipeShop.objects.filter(recipe=recipe).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+@transaction.atomic
+def apply_deltas(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not user_ids or not deltas:
+        return
+    items = ShoppingCartItem.objects.select_for_update().filter(
+        user_id__in=user_ids,
+        ingredient_id__in=deltas
+    )
+    existing = {(item.user_id, item.ingredient_id): item for item in items}
+    to_update, to_delete, to_create = [], [], []
+    for user_id in user_ids:
+        for ingredient_id, delta in deltas.items():
+            item = existing.get((user_id, ingredient_id))
+            if item is None:
+                if delta > 0:
+                    to_create.append(ShoppingCartItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=delta
+                    ))
+                continue
+            item.total_amount += delta
+            if item.total_amount > 0:
+                to_update.append(item)
+            else:
+                to_delete.append(item.id)
+    ShoppingCartItem.objects.bulk_create(to_create)
+    ShoppingCartItem.objects.bulk_update(to_update, ['total_amount'])
+    ShoppingCartItem.objects.filter(id__in=to_delete).delete()
+
+
+def add_recipe(user, recipe):
+    apply_deltas([user.id], recipe_amounts(recipe))
+
+
+def remove_recipe(user, recipe):
+    apply_deltas([user.id], amounts_delta(recipe_amounts(recipe), {}))
+
+
+def add_recipes(user, recipe_ids):
+    apply_deltas([user.id], recipes_amounts(recipe_ids))
+
+
+def remove_recipes(user, recipe_ids):
+    apply_deltas([user.id], amounts_delta(recipes_amounts(recipe_ids), {}))
+
+
+def remove_recipe_from_carts(recipe):
+    apply_deltas(
+        recipe_users(recipe),
+        amounts_delta(recipe_amounts(recipe), {})
+    )
+
+
+def update_recipe_in_carts(recipe, old_amounts, new_amounts=None):
+    if new_amounts is None:
+        new_amounts = recipe_amounts(recipe)
+    apply_deltas(recipe_users(recipe), amounts_delta(old_amounts, new_amounts))
+
+
+def expected_items(user_ids=None):
+    if user_ids is None:
+        lookups = {'recipe__recipe_shop__isnull': False}
+    else:
+        lookups = {'recipe__recipe_shop__user_id__in': user_ids}
+    queryset = RecipeIngredient.objects.filter(**lookups)
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in queryset.values_list(
+            'recipe__recipe_shop__user_id', 'ingredient_id'
+        ).annotate(
+            total=Sum('amount')
+        ).order_by().iterator()
+    }
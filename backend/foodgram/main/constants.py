@@ -2,10 +2,14 @@ START_URL = 'https://foodgram-blokhin.ddns.net/api/'
 RECIPE_URL = 'https://foodgram-blokhin.ddns.net/recipes/'
 
 MAX_LENGTH = 150
+MAX_FIELD_LENGTH = 20
 MAX_EMAIL_LENGTH = 254
 
-SHORT_URL_LENGTH = 8
+SHORT_URL_LENGTH = 6
 SHORT_URL_SPLIT = 's/'
+SHORT_URL_ROUNDS = 4
+SHORT_URL_CACHE_SIZE = 10000
+BASE62 = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
 MIN_COOK_TIME = 5
 MAX_COOK_TIME = 1000
@@ -13,4 +17,43 @@ MAX_COOK_TIME = 1000
 MIN_AMOUNT = 1
 MAX_AMOUNT = 100000
 
-CONTENT_DISPOSITION = 'attachment; filename="shopping_cart.txt"'
+CONTENT_DISPOSITION = 'attachment; filename="shopping_cart.{}"'
+SHOPPING_CART_TITLE = 'Корзина покупок:'
+EXPORT_CHUNK_SIZE = 2000
+PDF_FONT_NAME = 'DejaVuSans'
+PDF_FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+
+NGRAM_SIZE = 3
+INGREDIENT_SEARCH_LIMIT = 50
+INGREDIENT_INDEX_TTL = 300
+
+API_CACHE_ALIAS = 'api'
+API_VERSION_CACHE_ALIAS = 'api_versions'
+TAGS_CACHE = 'tags'
+INGREDIENTS_CACHE = 'ingredients'
+PRIMARY_STICKY_KEY = 'primary:{}'
+PRIMARY_STICKY_COOKIE = 'primary_sticky'
+
+APPROXIMATE_COUNT_THRESHOLD = 1000
+COUNT_CACHE_TIMEOUT = 60
+USER_FILTERS = ('is_favorited', 'is_in_shopping_cart')
+
+IMAGE_RENDITIONS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+IMAGE_QUALITY = 80
+IMAGE_JOB_ATTEMPTS = 3
+IMAGE_JOB_TIMEOUT = 300
+RENDITIONS_DIR = 'renditions'
+HASH_SHARD_WIDTH = 2
+HASH_SHARD_DEPTH = 2
+MEDIA_GC_GRACE_HOURS = 24
+
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_LIMIT = 200
+
+BATCH_MAX_SIZE = 100
@@ -0,0 +1,61 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from main.models import Follow, Recipe, RecipeFavorite, RecipeShop, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', RecipeFavorite, 'recipe'),
+    (Recipe, 'in_carts_count', RecipeShop, 'recipe'),
+    (User, 'followers_count', Follow, 'author'),
+    (User, 'recipes_count', Recipe, 'author'),
+)
+
+
+def change_counters(model, pks, field, delta):
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def change_counter(model, pk, field, delta):
+    change_counters(model, [pk], field, delta)
+
+
+def expected_count(source, related_field):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(
+                **{related_field: OuterRef('pk')}
+            ).order_by().values(related_field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0)
+    )
+
+
+def find_drift():
+    drift = []
+    for model, field, source, related_field in COUNTERS:
+        rows = model.objects.annotate(
+            expected=expected_count(source, related_field)
+        ).exclude(
+            **{field: F('expected')}
+        ).values_list('pk', field, 'expected').order_by('pk')
+        drift.extend(
+            (model, field, pk, actual, expected)
+            for pk, actual, expected in rows.iterator()
+        )
+    return drift
+
+
+def reconcile(drift):
+    for model, field, source, related_field in COUNTERS:
+        pks = [
+            pk for drift_model, drift_field, pk, actual, expected in drift
+            if drift_model is model and drift_field == field
+        ]
+        if pks:
+            model.objects.filter(pk__in=pks).update(
+                **{field: expected_count(source, related_field)}
+            )
@@ -0,0 +1,123 @@
+from django.db import connection
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from main.constants import FEED_BACKFILL_LIMIT, FEED_FANOUT_LIMIT
+from main.models import FeedEntry, Follow, Recipe
+from main.utils import batches, bulk_batch_size
+
+
+def is_fanned_out(author):
+    return author.followers_count < FEED_FANOUT_LIMIT
+
+
+def create_entries(entries):
+    for batch in batches(entries, bulk_batch_size(FeedEntry, 1000)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(recipe):
+    recipe.author.refresh_from_db(fields=('followers_count',))
+    if not is_fanned_out(recipe.author):
+        return
+    create_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe.id,
+            author_id=recipe.author_id,
+            pub_date=recipe.pub_date
+        )
+        for user_id in Follow.objects.filter(
+            author_id=recipe.author_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def backfill(user, author):
+    if not is_fanned_out(author):
+        return
+    create_entries(
+        FeedEntry(
+            user_id=user.id,
+            recipe_id=recipe_id,
+            author_id=author.id,
+            pub_date=pub_date
+        )
+        for recipe_id, pub_date in Recipe.objects.filter(
+            author=author
+        ).order_by('-pub_date', '-id').values_list(
+            'id', 'pub_date'
+        )[:FEED_BACKFILL_LIMIT]
+    )
+
+
+def insert_entries(recipes):
+    ranked = recipes.order_by().annotate(
+        feed_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('author_id')],
+            order_by=[F('pub_date').desc(), F('id').desc()]
+        )
+    ).values('id', 'author_id', 'pub_date', 'feed_rank')
+    sql, params = ranked.query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {feed} (user_id, recipe_id, author_id, pub_date) '
+            'SELECT follow.user_id, ranked.id, ranked.author_id, '
+            'ranked.pub_date FROM ({sql}) AS ranked '
+            'JOIN {follow} AS follow ON follow.author_id = ranked.author_id '
+            'WHERE ranked.feed_rank <= %s ON CONFLICT DO NOTHING'.format(
+                feed=quote(FeedEntry._meta.db_table),
+                follow=quote(Follow._meta.db_table),
+                sql=sql
+            ),
+            params + (FEED_BACKFILL_LIMIT,)
+        )
+        return cursor.rowcount
+
+
+def rebuild():
+    FeedEntry.objects.all().delete()
+    return insert_entries(Recipe.objects.filter(
+        author__followers_count__lt=FEED_FANOUT_LIMIT
+    ))
+
+
+def refill(author_ids):
+    return insert_entries(Recipe.objects.filter(
+        author_id__in=author_ids,
+        author__followers_count=FEED_FANOUT_LIMIT - 1
+    ))
+
+
+def prune(user, author_ids):
+    FeedEntry.objects.filter(user=user, author_id__in=author_ids).delete()
+
+
+def before(cursor, date_field, id_field):
+    if cursor is None:
+        return Q()
+    pub_date, pk = cursor
+    return Q(
+        Q(**{f'{date_field}__lt': pub_date})
+        | Q(**{f'{id_field}__lt': pk}),
+        **{f'{date_field}__lte': pub_date}
+    )
+
+
+def feed_keys(user, cursor, limit):
+    stored = FeedEntry.objects.filter(
+        before(cursor, 'pub_date', 'recipe_id'),
+        user=user
+    ).order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:limit]
+    pulled = Recipe.objects.filter(
+        before(cursor, 'pub_date', 'id'),
+        author__in=Follow.objects.filter(
+            user=user,
+            author__followers_count__gte=FEED_FANOUT_LIMIT
+        ).values('author_id')
+    ).order_by('-pub_date', '-id').values_list('pub_date', 'id')[:limit]
+    return sorted(set(stored) | set(pulled), reverse=True)[:limit]
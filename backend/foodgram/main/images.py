@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from main.constants import (
+    IMAGE_JOB_ATTEMPTS,
+    IMAGE_JOB_TIMEOUT,
+    IMAGE_QUALITY,
+    IMAGE_RENDITIONS,
+    RENDITIONS_DIR
+)
+from main.models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix='images'
+            )
+        return executor
+
+
+def rendition_path(source, name, extension):
+    root, _ = os.path.splitext(source)
+    return f'{RENDITIONS_DIR}/{root}_{name}.{extension}'
+
+
+def rendition_urls(instance, field, request=None):
+    source = getattr(instance, field).name
+    if not source:
+        return None
+    for job in instance.image_jobs.all():
+        if (
+            job.field == field
+            and job.source == source
+            and job.status == ImageJob.DONE
+        ):
+            urls = {
+                name: default_storage.url(
+                    rendition_path(source, name, job.extension)
+                )
+                for name in IMAGE_RENDITIONS
+            }
+            if request is not None:
+                urls = {
+                    name: request.build_absolute_uri(url)
+                    for name, url in urls.items()
+                }
+            return urls
+    return None
+
+
+def enqueue(instance, field):
+    source = getattr(instance, field).name
+    if not source:
+        return None
+    extension = ImageJob.objects.filter(
+        source=source,
+        status=ImageJob.DONE
+    ).values_list('extension', flat=True).first()
+    job = ImageJob.objects.create(
+        content_object=instance,
+        field=field,
+        source=source,
+        status=ImageJob.PENDING if extension is None else ImageJob.DONE,
+        extension=extension or ''
+    )
+    if extension is None and settings.IMAGE_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_job, job.id)
+        )
+    return job
+
+
+def output_format():
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def render_renditions(source):
+    image_format, extension = output_format()
+    with default_storage.open(source) as image_file:
+        image = ImageOps.exif_transpose(Image.open(image_file))
+        image.load()
+    if image_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+    for name, size in IMAGE_RENDITIONS.items():
+        rendition = image.copy()
+        rendition.thumbnail(size, Image.LANCZOS)
+        buffer = BytesIO()
+        rendition.save(buffer, image_format, quality=IMAGE_QUALITY)
+        path = rendition_path(source, name, extension)
+        default_storage.delete(path)
+        default_storage.save(path, ContentFile(buffer.getvalue()))
+    return extension
+
+
+def process_job(job_id):
+    claimed = ImageJob.objects.filter(
+        id=job_id,
+        status=ImageJob.PENDING
+    ).update(
+        status=ImageJob.RUNNING,
+        attempts=F('attempts') + 1,
+        updated=timezone.now()
+    )
+    if not claimed:
+        return None
+    job = ImageJob.objects.get(id=job_id)
+    try:
+        job.extension = render_renditions(job.source)
+    except Exception as error:
+        logger.exception('Не удалось обработать %s', job.source)
+        job.error = str(error)
+        job.status = (
+            ImageJob.PENDING if job.attempts < IMAGE_JOB_ATTEMPTS
+            else ImageJob.FAILED
+        )
+    else:
+        job.error = ''
+        job.status = ImageJob.DONE
+    job.save(update_fields=('extension', 'error', 'status', 'updated'))
+    return job.status
+
+
+def run_job(job_id):
+    try:
+        status = process_job(job_id)
+    finally:
+        connections.close_all()
+    if status == ImageJob.PENDING:
+        get_executor().submit(run_job, job_id)
+
+
+def requeue_stale():
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        updated__lt=timezone.now() - timedelta(seconds=IMAGE_JOB_TIMEOUT)
+    ).update(status=ImageJob.PENDING, updated=timezone.now())
@@ -0,0 +1,260 @@
+import base64
+import io
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from main.models import Ingredient, Recipe, Tag, User
+
+
+def tiny_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def percentile(quantiles, value):
+    return round(quantiles[value - 1] * 1000, 3)
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержку и число запросов к БД на основных эндпоинтах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--user',
+            help='Email пользователя, от имени которого идут запросы.'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Запустить только указанные сценарии.'
+        )
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+        parser.add_argument(
+            '--compare',
+            help='JSON предыдущего запуска для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests должен быть не меньше 2.')
+        self.rng = random.Random(options['seed'])
+        self.user = self.get_user(options['user'])
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client = Client(
+            HTTP_HOST='localhost',
+            HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        self.recipe_ids = list(
+            Recipe.objects.values_list('id', flat=True)[:10000]
+        )
+        self.author_ids = list(
+            User.objects.annotate(
+                total=Count('recipes')
+            ).order_by('-total').values_list('id', flat=True)[:100]
+        )
+        self.tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+        self.tag_ids = list(Tag.objects.values_list('id', flat=True))
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)[:1000]
+        )
+        self.ingredient_names = list(
+            Ingredient.objects.values_list('name', flat=True)[:1000]
+        )
+        if not self.recipe_ids or not self.ingredient_ids:
+            raise CommandError(
+                'Нет данных: запустите load_data или generate_fixture.'
+            )
+        self.image = tiny_image()
+        self.created = []
+        scenarios = self.get_scenarios()
+        if options['scenario']:
+            unknown = set(options['scenario']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Неизвестные сценарии: {unknown}')
+            scenarios = {
+                name: scenarios[name] for name in options['scenario']
+            }
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                with transaction.atomic():
+                    for name, scenario in scenarios.items():
+                        results[name] = self.run(
+                            scenario, options['requests'], options['warmup']
+                        )
+                        self.report(name, results[name])
+                    transaction.set_rollback(True)
+        report = {
+            'commit': self.get_commit(),
+            'date': datetime.now().isoformat(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {email}')
+            return user
+        user = User.objects.annotate(
+            total=Count('follower')
+        ).order_by('-total', 'id').first()
+        if user is None:
+            raise CommandError('В базе нет пользователей.')
+        return user
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True,
+                text=True,
+                check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def recipe_payload(self):
+        return {
+            'name': f'Benchmark {len(self.created)} {self.rng.random()}',
+            'text': 'Рецепт для замера производительности.',
+            'cooking_time': self.rng.randint(5, 120),
+            'image': self.image,
+            'tags': [self.rng.choice(self.tag_ids)],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': self.rng.randint(1, 500)}
+                for ingredient_id in self.rng.sample(
+                    self.ingredient_ids, min(5, len(self.ingredient_ids))
+                )
+            ],
+        }
+
+    def create_recipe(self):
+        response = self.client.post(
+            '/api/recipes/',
+            json.dumps(self.recipe_payload()),
+            content_type='application/json'
+        )
+        if response.status_code == 201:
+            self.created.append(response.json()['id'])
+        return response
+
+    def update_recipe(self):
+        if not self.created:
+            self.create_recipe()
+        return self.client.patch(
+            f'/api/recipes/{self.rng.choice(self.created)}/',
+            json.dumps(self.recipe_payload()),
+            content_type='application/json'
+        )
+
+    def get_scenarios(self):
+        get = self.client.get
+        return {
+            'recipe_list': lambda: get('/api/recipes/?limit=6'),
+            'recipe_list_deep': lambda: get(
+                f'/api/recipes/?limit=6&page='
+                f'{self.rng.randint(1, max(len(self.recipe_ids) // 6, 1))}'
+            ),
+            'recipe_detail': lambda: get(
+                f'/api/recipes/{self.rng.choice(self.recipe_ids)}/'
+            ),
+            'filter_tags': lambda: get(
+                f'/api/recipes/?tags={self.rng.choice(self.tag_slugs)}'
+            ),
+            'filter_author': lambda: get(
+                f'/api/recipes/?author={self.rng.choice(self.author_ids)}'
+            ),
+            'filter_favorited': lambda: get('/api/recipes/?is_favorited=1'),
+            'ingredient_search': lambda: get(
+                '/api/ingredients/?name='
+                + self.rng.choice(self.ingredient_names)[:3]
+            ),
+            'subscriptions': lambda: get(
+                '/api/users/subscriptions/?recipes_limit=3'
+            ),
+            'cart_download': lambda: get(
+                '/api/recipes/download_shopping_cart/'
+            ),
+            'recipe_create': self.create_recipe,
+            'recipe_update': self.update_recipe,
+        }
+
+    def run(self, scenario, requests, warmup):
+        for _ in range(warmup):
+            scenario()
+        timings, queries, sizes, errors = [], [], [], 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as context:
+                begin = time.perf_counter()
+                response = scenario()
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response)
+                else:
+                    size = len(response.content)
+                timings.append(time.perf_counter() - begin)
+            queries.append(len(context.captured_queries))
+            sizes.append(size)
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+        quantiles = statistics.quantiles(timings, n=100)
+        return {
+            'p50_ms': percentile(quantiles, 50),
+            'p95_ms': percentile(quantiles, 95),
+            'p99_ms': percentile(quantiles, 99),
+            'rps': round(requests / elapsed, 1),
+            'queries_avg': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+            'bytes_avg': round(statistics.mean(sizes)),
+            'errors': errors,
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<20} p50={result["p50_ms"]:>8}ms '
+            f'p95={result["p95_ms"]:>8}ms p99={result["p99_ms"]:>8}ms '
+            f'rps={result["rps"]:>8} queries={result["queries_avg"]:>6} '
+            f'errors={result["errors"]}'
+        )
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        self.stdout.write(f'Сравнение с {path}:')
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            self.stdout.write(
+                f'{name:<20} '
+                f'p95 {before["p95_ms"]} -> {result["p95_ms"]}ms, '
+                f'rps {before["rps"]} -> {result["rps"]}, '
+                f'queries {before["queries_avg"]} -> {result["queries_avg"]}'
+            )
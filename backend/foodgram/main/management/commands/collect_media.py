@@ -0,0 +1,77 @@
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from main.constants import MEDIA_GC_GRACE_HOURS, RENDITIONS_DIR
+from main.models import Recipe, User
+from main.storage import content_storage
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы картинок, на которые не ссылается ни одна запись.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=MEDIA_GC_GRACE_HOURS,
+            help='Не трогать файлы моложе указанного возраста.'
+        )
+
+    def handle(self, *args, **options):
+        references = Counter()
+        for model, field in ((Recipe, 'image'), (User, 'avatar')):
+            references.update(
+                model.objects.exclude(**{field: ''}).values_list(
+                    field, flat=True
+                ).iterator()
+            )
+        sources = {os.path.splitext(name)[0] for name in references}
+        deadline = time.time() - options['grace_hours'] * 3600
+        removed = size = 0
+        for directory in (
+            Recipe.image.field.upload_to,
+            User.avatar.field.upload_to,
+            RENDITIONS_DIR
+        ):
+            for name in self.walk(directory):
+                if self.referenced(name, references, sources):
+                    continue
+                path = content_storage.path(name)
+                if os.path.getmtime(path) > deadline:
+                    continue
+                size += os.path.getsize(path)
+                removed += 1
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    content_storage.purge(name)
+        self.stdout.write(
+            f'Файлов со ссылками: {len(references)}, '
+            f'общих: {sum(count > 1 for count in references.values())}, '
+            f'{"к удалению" if options["dry_run"] else "удалено"}: '
+            f'{removed} ({size} байт)'
+        )
+
+    def walk(self, directory):
+        root = content_storage.path('')
+        for path, _, files in os.walk(content_storage.path(directory)):
+            for file_name in files:
+                yield os.path.relpath(
+                    os.path.join(path, file_name), root
+                ).replace(os.sep, '/')
+
+    def referenced(self, name, references, sources):
+        if name in references:
+            return True
+        if not name.startswith(RENDITIONS_DIR + '/'):
+            return False
+        source = name[len(RENDITIONS_DIR) + 1:].rsplit('_', 1)[0]
+        return source in sources
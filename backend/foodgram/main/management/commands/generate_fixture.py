@@ -0,0 +1,269 @@
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from main.models import (
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeFavorite,
+    RecipeIngredient,
+    RecipeShop,
+    RecipeTag,
+    Tag,
+    User
+)
+from main.utils import batches, bulk_batch_size
+
+
+START_DATE = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+class ZipfSampler:
+
+    def __init__(self, rng, population, skew):
+        self.rng = rng
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = list(accumulate(
+            1 / rank ** skew for rank in range(1, len(self.population) + 1)
+        ))
+
+    def sample(self, count, exclude=None):
+        count = min(count, len(self.population) - (exclude is not None))
+        chosen = set()
+        attempts = 0
+        while len(chosen) < count and attempts < count * 10:
+            for value in self.rng.choices(
+                self.population,
+                cum_weights=self.cum_weights,
+                k=count - len(chosen)
+            ):
+                if value != exclude:
+                    chosen.add(value)
+            attempts += count
+        return chosen
+
+
+class Command(BaseCommand):
+    help = 'Генерирует большой детерминированный набор данных для нагрузки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Среднее число подписок на пользователя.'
+        )
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=30,
+            help='Среднее число рецептов в избранном у пользователя.'
+        )
+        parser.add_argument(
+            '--carts',
+            type=int,
+            default=5,
+            help='Среднее число рецептов в корзине у пользователя.'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe',
+            type=int,
+            default=6
+        )
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--password', default='fixture_password')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+        if not ingredient_ids or not tag_ids:
+            raise CommandError(
+                'Сначала загрузите ингредиенты и теги: '
+                'python manage.py load_data'
+            )
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'], options['password'])
+            recipe_ids = self.create_recipes(options['recipes'], user_ids)
+            self.create_recipe_links(
+                recipe_ids,
+                ingredient_ids,
+                tag_ids,
+                options['ingredients_per_recipe'],
+                options['tags_per_recipe']
+            )
+            self.create_relations(
+                Follow, ('user_id', 'author_id'),
+                user_ids, user_ids, options['follows'], exclude_self=True
+            )
+            self.create_relations(
+                RecipeFavorite, ('user_id', 'recipe_id'),
+                user_ids, recipe_ids, options['favorites']
+            )
+            self.create_relations(
+                RecipeShop, ('user_id', 'recipe_id'),
+                user_ids, recipe_ids, options['carts']
+            )
+            self.reset_sequences()
+        call_command('rebuild_shopping_cart', stdout=self.stdout)
+        call_command('reconcile_counters', stdout=self.stdout)
+        call_command('rebuild_feed', stdout=self.stdout)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+    def write(self, model, fields, rows):
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(field).column)
+            for field in fields
+        )
+        total = 0
+        for batch in batches(rows, self.batch_size):
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                csv.writer(
+                    buffer, quoting=csv.QUOTE_NONNUMERIC
+                ).writerows(batch)
+                buffer.seek(0)
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(
+                        f'COPY {table} ({columns}) FROM STDIN WITH CSV',
+                        buffer
+                    )
+            else:
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in batch],
+                    batch_size=bulk_batch_size(model, self.batch_size)
+                )
+            total += len(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: +{total}')
+
+    def count_for(self, average):
+        return int(self.rng.expovariate(1 / average)) if average else 0
+
+    def create_users(self, count, password):
+        password = make_password(password)
+        start = self.next_id(User)
+        ids = range(start, start + count)
+        self.write(
+            User,
+            (
+                'id', 'password', 'is_superuser', 'username', 'first_name',
+                'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+                'avatar'
+            ),
+            (
+                (
+                    user_id, password, False, f'fixture_{user_id}',
+                    'Fixture', f'User {user_id}',
+                    f'fixture_{user_id}@example.com', False, True,
+                    START_DATE, ''
+                )
+                for user_id in ids
+            )
+        )
+        return list(ids)
+
+    def create_recipes(self, count, user_ids):
+        authors = ZipfSampler(self.rng, user_ids, self.skew)
+        start = self.next_id(Recipe)
+        ids = range(start, start + count)
+        author_ids = self.rng.choices(
+            authors.population, cum_weights=authors.cum_weights, k=count
+        )
+        self.write(
+            Recipe,
+            (
+                'id', 'author_id', 'name', 'text', 'cooking_time', 'image',
+                'pub_date'
+            ),
+            (
+                (
+                    recipe_id, author_id, f'Рецепт {recipe_id}',
+                    'Сгенерировано командой generate_fixture.',
+                    self.rng.randint(5, 180), '',
+                    START_DATE + timedelta(minutes=index)
+                )
+                for index, (recipe_id, author_id)
+                in enumerate(zip(ids, author_ids))
+            )
+        )
+        return list(ids)
+
+    def create_recipe_links(self, recipe_ids, ingredient_ids, tag_ids,
+                            ingredients_per_recipe, tags_per_recipe):
+        ingredients = ZipfSampler(self.rng, ingredient_ids, self.skew)
+        self.write(
+            RecipeIngredient,
+            ('recipe_id', 'ingredient_id', 'amount'),
+            (
+                (recipe_id, ingredient_id, self.rng.randint(1, 500))
+                for recipe_id in recipe_ids
+                for ingredient_id in ingredients.sample(
+                    max(1, self.count_for(ingredients_per_recipe))
+                )
+            )
+        )
+        self.write(
+            RecipeTag,
+            ('recipe_id', 'tag_id'),
+            (
+                (recipe_id, tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in self.rng.sample(
+                    tag_ids,
+                    self.rng.randint(1, min(tags_per_recipe, len(tag_ids)))
+                )
+            )
+        )
+
+    def create_relations(self, model, fields, user_ids, target_ids, average,
+                         exclude_self=False):
+        targets = ZipfSampler(self.rng, target_ids, self.skew)
+        self.write(
+            model,
+            fields,
+            (
+                (user_id, target_id)
+                for user_id in user_ids
+                for target_id in targets.sample(
+                    self.count_for(average),
+                    exclude=user_id if exclude_self else None
+                )
+            )
+        )
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Recipe]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
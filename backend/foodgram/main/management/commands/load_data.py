@@ -1,11 +1,16 @@
+import base64
+import csv
 import json
 import os
-import base64
+from concurrent.futures import ProcessPoolExecutor
 
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from django.core.files.base import ContentFile
-from django.core.management.base import BaseCommand
-
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
 
 from main.models import (
     Ingredient,
@@ -15,98 +20,259 @@ from main.models import (
     Tag,
     User
 )
+from main.storage import content_storage
+from main.utils import batches, bulk_batch_size
 
 
 directory = os.path.join(settings.BASE_DIR, 'main/data/')
 
 
-class Command(BaseCommand):
+def read_json(name):
+    with open(os.path.join(directory, name), encoding='utf-8') as json_file:
+        return json.load(json_file)
 
-    def handle(self, *args, **options):
-        add_users()
-        add_ingredients()
-        add_tags()
-        add_recipes()
-
-
-def add_users():
-    with open(directory + 'users.json', encoding='utf-8') as json_file:
-        for user in json.load(json_file):
-            with open(
-                directory + 'avatars.json', encoding='utf-8'
-            ) as images_file:
-                image = json.load(images_file)[0].get(
-                    user.get('avatar')
-                )
-            if user.get('is_superuser', False):
-                User.objects.create_superuser(
-                    email=user.get('email'),
-                    username=user.get('username'),
-                    first_name=user.get('first_name'),
-                    last_name=user.get('last_name'),
-                    password=user.get('password'),
-                    avatar=ContentFile(
-                        base64.b64decode(image),
-                        name=f"{user.get('avatar')}.jpg"
-                    ),
-                    is_superuser=True
-                )
-            else:
-                User.objects.create_user(
-                    email=user.get('email'),
-                    username=user.get('username'),
-                    first_name=user.get('first_name'),
-                    last_name=user.get('last_name'),
-                    password=user.get('password'),
-                    avatar=ContentFile(
-                        base64.b64decode(image),
-                        name=f"{user.get('avatar')}.jpg"
-                    )
-                )
 
+def read_ingredients(path):
+    with open(path, encoding='utf-8') as data_file:
+        if path.endswith('.csv'):
+            for row in csv.reader(data_file):
+                if row:
+                    yield {'name': row[0], 'measurement_unit': row[1]}
+        else:
+            yield from json.load(data_file)
 
-def add_ingredients():
-    with open(
-        directory + 'ingredients.json', encoding='utf-8'
-    ) as json_file:
-        for ingredient in json.load(json_file):
-            Ingredient.objects.create(**ingredient)
 
+def save_image(job):
+    name, data = job
+    return content_storage.save(name, ContentFile(base64.b64decode(data)))
 
-def add_tags():
-    with open(directory + 'tags.json', encoding='utf-8') as json_file:
-        for tag in json.load(json_file):
-            Tag.objects.create(**tag)
 
+class Command(BaseCommand):
+    help = 'Загружает тестовые данные из main/data/.'
 
-def add_recipes():
-    with open(directory + 'recipes.json', encoding='utf-8') as json_file:
-        for recipe in json.load(json_file):
-            with open(
-                directory + 'images.json', encoding='utf-8'
-            ) as images_file:
-                image = json.load(images_file)[0].get(
-                    recipe.get('image')
-                )
-            finish_recipe = Recipe.objects.create(
-                id=recipe.get('id'),
-                author=User.objects.get(id=recipe.get('author')),
-                name=recipe.get('name'),
-                text=recipe.get('text'),
-                cooking_time=recipe.get('cooking_time'),
-                image=ContentFile(
-                    base64.b64decode(image),
-                    name=f"{recipe.get('image')}.jpeg"
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для bulk_create.'
+        )
+        parser.add_argument(
+            '--ingredients',
+            default=os.path.join(directory, 'ingredients.json'),
+            help='Файл ингредиентов в формате .json или .csv.'
+        )
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Удалить существующие данные перед загрузкой.'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Пропускать уже загруженные записи.'
+        )
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=0,
+            help='Число процессов для декодирования и записи картинок.'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.parallel = options['parallel']
+        self.upsert = options['upsert']
+        if not os.path.exists(options['ingredients']):
+            raise CommandError(f'Нет файла {options["ingredients"]}')
+        with transaction.atomic():
+            if options['truncate']:
+                self.truncate()
+            users = self.add_users()
+            ingredients = self.add_ingredients(options['ingredients'])
+            tags = self.add_tags()
+            self.add_recipes(users, ingredients, tags)
+            self.reset_sequences()
+        call_command('reconcile_counters', stdout=self.stdout)
+        call_command('rebuild_feed', stdout=self.stdout)
+
+    def truncate(self):
+        for model in (Recipe, Ingredient, Tag, User):
+            model.objects.all().delete()
+
+    def save_images(self, jobs):
+        if not jobs:
+            return []
+        if self.parallel > 1:
+            with ProcessPoolExecutor(self.parallel) as executor:
+                return list(executor.map(save_image, jobs))
+        return [save_image(job) for job in jobs]
+
+    def add_users(self):
+        users = read_json('users.json')
+        avatars = read_json('avatars.json')[0]
+        existing = User.objects.in_bulk(
+            [user['email'] for user in users],
+            field_name='email'
+        )
+        if existing and not self.upsert:
+            raise CommandError(
+                'Пользователи уже загружены, используйте --upsert '
+                'или --truncate.'
+            )
+        new_users = [user for user in users if user['email'] not in existing]
+        avatar_names = self.save_images([
+            (
+                User.avatar.field.generate_filename(
+                    None, f"{user['avatar']}.jpg"
+                ),
+                avatars[user['avatar']]
+            )
+            for user in new_users
+        ])
+        User.objects.bulk_create(
+            [
+                User(
+                    email=user['email'],
+                    username=user['username'],
+                    first_name=user['first_name'],
+                    last_name=user['last_name'],
+                    password=make_password(user['password']),
+                    avatar=avatar,
+                    is_superuser=bool(user.get('is_superuser')),
+                    is_staff=bool(user.get('is_superuser'))
                 )
+                for user, avatar in zip(new_users, avatar_names)
+            ],
+            batch_size=bulk_batch_size(User, self.batch_size)
+        )
+        by_email = User.objects.in_bulk(
+            [user['email'] for user in users],
+            field_name='email'
+        )
+        self.stdout.write(f'Пользователи: +{len(new_users)}')
+        return {
+            index: by_email[user['email']]
+            for index, user in enumerate(users, 1)
+        }
+
+    def add_ingredients(self, path):
+        existing = {
+            (name, unit): pk
+            for name, unit, pk in Ingredient.objects.values_list(
+                'name', 'measurement_unit', 'id'
+            ).iterator()
+        }
+        if existing and not self.upsert:
+            raise CommandError(
+                'Ингредиенты уже загружены, используйте --upsert '
+                'или --truncate.'
             )
-            RecipeTag.objects.create(
-                recipe=finish_recipe,
-                tag=Tag.objects.get(id=recipe.get('tag'))
+        keys = []
+        created = 0
+        for batch in batches(read_ingredients(path), self.batch_size):
+            new_ingredients = []
+            for ingredient in batch:
+                key = (ingredient['name'], ingredient['measurement_unit'])
+                keys.append(key)
+                if key not in existing:
+                    existing[key] = None
+                    new_ingredients.append(Ingredient(**ingredient))
+            Ingredient.objects.bulk_create(new_ingredients)
+            created += len(new_ingredients)
+        ids = {
+            (name, unit): pk
+            for name, unit, pk in Ingredient.objects.values_list(
+                'name', 'measurement_unit', 'id'
+            ).iterator()
+        }
+        self.stdout.write(f'Ингредиенты: +{created}')
+        return {index: ids[key] for index, key in enumerate(keys, 1)}
+
+    def add_tags(self):
+        tags = read_json('tags.json')
+        existing = Tag.objects.in_bulk(
+            [tag['slug'] for tag in tags],
+            field_name='slug'
+        )
+        if existing and not self.upsert:
+            raise CommandError(
+                'Теги уже загружены, используйте --upsert или --truncate.'
+            )
+        new_tags = [Tag(**tag) for tag in tags if tag['slug'] not in existing]
+        Tag.objects.bulk_create(new_tags)
+        by_slug = Tag.objects.in_bulk(
+            [tag['slug'] for tag in tags],
+            field_name='slug'
+        )
+        self.stdout.write(f'Теги: +{len(new_tags)}')
+        return {
+            index: by_slug[tag['slug']].id
+            for index, tag in enumerate(tags, 1)
+        }
+
+    def add_recipes(self, users, ingredients, tags):
+        recipes = read_json('recipes.json')
+        images = read_json('images.json')[0]
+        existing = set(Recipe.objects.filter(
+            id__in=[recipe['id'] for recipe in recipes]
+        ).values_list('id', flat=True))
+        if existing and not self.upsert:
+            raise CommandError(
+                'Рецепты уже загружены, используйте --upsert или --truncate.'
             )
-            RecipeIngredient.objects.create(
-                recipe=finish_recipe,
-                ingredient=Ingredient.objects.get(
-                    id=recipe.get('ingredients')
+        new_recipes = [
+            recipe for recipe in recipes if recipe['id'] not in existing
+        ]
+        image_names = self.save_images([
+            (
+                Recipe.image.field.generate_filename(
+                    None, f"{recipe['image']}.jpeg"
                 ),
-                amount=recipe.get('amount')
+                images[recipe['image']]
             )
+            for recipe in new_recipes
+        ])
+        Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    id=recipe['id'],
+                    author=users[recipe['author']],
+                    name=recipe['name'],
+                    text=recipe['text'],
+                    cooking_time=recipe['cooking_time'],
+                    image=image
+                )
+                for recipe, image in zip(new_recipes, image_names)
+            ],
+            batch_size=bulk_batch_size(Recipe, self.batch_size)
+        )
+        RecipeTag.objects.bulk_create(
+            [
+                RecipeTag(recipe_id=recipe['id'], tag_id=tags[recipe['tag']])
+                for recipe in new_recipes
+            ],
+            batch_size=bulk_batch_size(RecipeTag, self.batch_size),
+            ignore_conflicts=True
+        )
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe_id=recipe['id'],
+                    ingredient_id=ingredients[recipe['ingredients']],
+                    amount=recipe['amount']
+                )
+                for recipe in new_recipes
+            ],
+            batch_size=bulk_batch_size(RecipeIngredient, self.batch_size),
+            ignore_conflicts=True
+        )
+        self.stdout.write(f'Рецепты: +{len(new_recipes)}')
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Ingredient, Tag, Recipe]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
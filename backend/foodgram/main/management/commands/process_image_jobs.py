@@ -0,0 +1,75 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+
+from main.images import process_job, requeue_stale
+from main.models import ImageJob, Recipe, User
+from main.utils import batches
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь картинок и создаёт уменьшенные копии.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Поставить в очередь картинки, для которых нет задач.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь снова.'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.backfill()
+        while True:
+            requeued = requeue_stale()
+            if requeued:
+                self.stdout.write(f'Возвращено в очередь: {requeued}')
+            processed = self.process_pending()
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+    def backfill(self):
+        created = 0
+        for model, field in ((Recipe, 'image'), (User, 'avatar')):
+            content_type = ContentType.objects.get_for_model(model)
+            rows = model.objects.exclude(**{field: ''}).exclude(
+                image_jobs__field=field
+            ).values_list('id', field)
+            for batch in batches(rows.iterator(), BATCH_SIZE):
+                ImageJob.objects.bulk_create(
+                    ImageJob(
+                        content_type=content_type,
+                        object_id=object_id,
+                        field=field,
+                        source=source
+                    )
+                    for object_id, source in batch
+                )
+                created += len(batch)
+        self.stdout.write(f'Новых задач: {created}')
+
+    def process_pending(self):
+        done = failed = 0
+        job_ids = ImageJob.objects.filter(
+            status=ImageJob.PENDING
+        ).order_by('id').values_list('id', flat=True)
+        for job_id in list(job_ids):
+            status = process_job(job_id)
+            while status == ImageJob.PENDING:
+                status = process_job(job_id)
+            done += status == ImageJob.DONE
+            failed += status == ImageJob.FAILED
+        if done or failed:
+            self.stdout.write(f'Готово: {done}, с ошибкой: {failed}')
+        return done + failed
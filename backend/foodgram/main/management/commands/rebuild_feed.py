@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.feed import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из подписок и рецептов авторов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild()
+        self.stdout.write(f'Записей в лентах: {count}')
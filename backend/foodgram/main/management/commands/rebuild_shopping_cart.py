@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main.cart import expected_items
+from main.models import ShoppingCartItem
+from main.utils import bulk_batch_size
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает таблицу корзины покупок или проверяет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти расхождения, ничего не меняя.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = self.find_drift()
+            for (user_id, ingredient_id), (actual, expected) in drift.items():
+                self.stdout.write(
+                    f'user={user_id} ingredient={ingredient_id} '
+                    f'actual={actual} expected={expected}'
+                )
+            if drift:
+                raise CommandError(f'Расхождений: {len(drift)}')
+            self.stdout.write('Расхождений нет.')
+            return
+        with transaction.atomic():
+            ShoppingCartItem.objects.all().delete()
+            ShoppingCartItem.objects.bulk_create(
+                (
+                    ShoppingCartItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=total
+                    )
+                    for (user_id, ingredient_id), total
+                    in expected_items().items()
+                ),
+                batch_size=bulk_batch_size(
+                    ShoppingCartItem, options['batch_size']
+                )
+            )
+        self.stdout.write(
+            f'Позиций в корзинах: {ShoppingCartItem.objects.count()}'
+        )
+
+    def find_drift(self):
+        expected = expected_items()
+        actual = dict(
+            ((user_id, ingredient_id), total)
+            for user_id, ingredient_id, total
+            in ShoppingCartItem.objects.values_list(
+                'user_id', 'ingredient_id', 'total_amount'
+            ).order_by().iterator()
+        )
+        return {
+            key: (actual.get(key), expected.get(key))
+            for key in actual.keys() | expected.keys()
+            if actual.get(key) != expected.get(key)
+        }
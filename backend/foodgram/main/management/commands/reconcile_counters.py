@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main.counters import find_drift, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики избранного, корзин, подписчиков и рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти расхождения, ничего не меняя.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = find_drift()
+            for model, field, pk, actual, expected in drift:
+                self.stdout.write(
+                    f'{model._meta.model_name}={pk} {field} '
+                    f'actual={actual} expected={expected}'
+                )
+            if options['check']:
+                if drift:
+                    raise CommandError(f'Расхождений: {len(drift)}')
+                self.stdout.write('Расхождений нет.')
+                return
+            reconcile(drift)
+        self.stdout.write(f'Исправлено счетчиков: {len(drift)}')
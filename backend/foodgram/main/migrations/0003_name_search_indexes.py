@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+TABLES = ('main_ingredient', 'main_recipe')
+
+# istartswith/icontains в PostgreSQL превращаются в
+# UPPER("name"::text) LIKE UPPER(%s), поэтому индексы строятся
+# по тому же выражению.
+CREATE_SQL = (
+    'CREATE INDEX IF NOT EXISTS {table}_name_prefix '
+    'ON {table} (UPPER(name::text) text_pattern_ops);',
+    'CREATE INDEX IF NOT EXISTS {table}_name_trgm '
+    'ON {table} USING gin (UPPER(name::text) gin_trgm_ops);',
+)
+
+DROP_SQL = (
+    'DROP INDEX IF EXISTS {table}_name_prefix;',
+    'DROP INDEX IF EXISTS {table}_name_trgm;',
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    for table in TABLES:
+        for statement in CREATE_SQL:
+            schema_editor.execute(statement.format(table=table))
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        for statement in DROP_SQL:
+            schema_editor.execute(statement.format(table=table))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_auto_20230115_1354'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
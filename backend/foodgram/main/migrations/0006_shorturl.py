@@ -0,0 +1,54 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+from main.constants import MAX_LENGTH
+
+
+def create_or_alter(apps, schema_editor):
+    ShortUrl = apps.get_model('main', 'ShortUrl')
+    connection = schema_editor.connection
+    table = ShortUrl._meta.db_table
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+    if table not in tables:
+        schema_editor.create_model(ShortUrl)
+        return
+    db = connection.alias
+    for field in ('recipe_id', 'short_url'):
+        keep = ShortUrl.objects.using(db).values(field).annotate(
+            first=Min('id')
+        ).values_list('first', flat=True)
+        ShortUrl.objects.using(db).exclude(id__in=list(keep)).delete()
+    old_fields = {
+        'recipe_id': models.PositiveIntegerField(),
+        'short_url': models.SlugField(max_length=MAX_LENGTH),
+    }
+    for name, old_field in old_fields.items():
+        old_field.set_attributes_from_name(name)
+        old_field.model = ShortUrl
+        schema_editor.alter_field(
+            ShortUrl, old_field, ShortUrl._meta.get_field(name)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_recipe_pub_date_id_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ShortUrl',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('recipe_id', models.PositiveIntegerField(unique=True)),
+                        ('short_url', models.SlugField(max_length=150, unique=True)),
+                    ],
+                ),
+            ],
+        ),
+        migrations.RunPython(create_or_alter, migrations.RunPython.noop),
+    ]
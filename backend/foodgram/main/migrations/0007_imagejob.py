@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('main', '0006_shorturl'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('field', models.CharField(max_length=20, verbose_name='поле')),
+                ('source', models.CharField(max_length=150, verbose_name='исходный файл')),
+                ('status', models.CharField(choices=[('pending', 'в очереди'), ('running', 'обрабатывается'), ('done', 'готово'), ('failed', 'ошибка')], db_index=True, default='pending', max_length=20, verbose_name='статус')),
+                ('extension', models.CharField(blank=True, max_length=20, verbose_name='расширение копий')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попыток')),
+                ('error', models.TextField(blank=True, verbose_name='ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создано')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='обновлено')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType', verbose_name='тип объекта')),
+            ],
+            options={
+                'verbose_name': 'обработка картинки',
+                'verbose_name_plural': 'обработка картинок',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imagejob',
+            index=models.Index(fields=['content_type', 'object_id'], name='image_job_object'),
+        ),
+    ]
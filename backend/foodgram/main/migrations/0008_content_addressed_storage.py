@@ -0,0 +1,22 @@
+from django.db import migrations, models
+import main.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagejob',
+            name='source',
+            field=models.CharField(db_index=True, max_length=150, verbose_name='исходный файл'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, storage=main.storage.ContentAddressedStorage(), upload_to='recipe/', verbose_name='Картинка'),
+        ),
+    ]
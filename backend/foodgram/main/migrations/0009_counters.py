@@ -0,0 +1,64 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('main', 'Recipe')
+    User = apps.get_model('main', 'User')
+    counters = (
+        (Recipe, 'favorites_count', 'RecipeFavorite', 'recipe'),
+        (Recipe, 'in_carts_count', 'RecipeShop', 'recipe'),
+        (User, 'followers_count', 'Follow', 'author'),
+        (User, 'recipes_count', 'Recipe', 'author'),
+    )
+    for model, field, source, related_field in counters:
+        source = apps.get_model('main', source)
+        model.objects.update(**{field: Coalesce(
+            Subquery(
+                source.objects.filter(
+                    **{related_field: OuterRef('pk')}
+                ).order_by().values(related_field).annotate(
+                    total=Count('pk')
+                ).values('total')
+            ),
+            Value(0)
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='в избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='в корзинах'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['favorites_count', 'id'],
+                name='recipe_favorites_count_id'
+            ),
+        ),
+    ]
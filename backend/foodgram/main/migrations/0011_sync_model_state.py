@@ -0,0 +1,113 @@
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import main.storage
+
+
+def get_columns(schema_editor, model):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        return {
+            column.name for column in
+            connection.introspection.get_table_description(
+                cursor, model._meta.db_table
+            )
+        }
+
+
+def add_avatar(apps, schema_editor):
+    User = apps.get_model('main', 'User')
+    if 'avatar' not in get_columns(schema_editor, User):
+        schema_editor.add_field(User, User._meta.get_field('avatar'))
+
+
+def relax_tag_color(apps, schema_editor):
+    Tag = apps.get_model('main', 'Tag')
+    if 'color' not in get_columns(schema_editor, Tag):
+        return
+    old_field = models.CharField(max_length=7)
+    new_field = models.CharField(max_length=7, null=True)
+    for field in (old_field, new_field):
+        field.set_attributes_from_name('color')
+        field.model = Tag
+    schema_editor.alter_field(Tag, old_field, new_field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(relax_tag_color, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='tag',
+                    name='color',
+                ),
+                migrations.AddField(
+                    model_name='user',
+                    name='avatar',
+                    field=models.ImageField(blank=True, storage=main.storage.ContentAddressedStorage(), upload_to='users/', verbose_name='Аватар'),
+                ),
+            ],
+        ),
+        migrations.RunPython(add_avatar, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='ingredient',
+                    name='measurement_unit',
+                    field=models.CharField(help_text='Введите единицу измерения', max_length=150, verbose_name='единица измерения'),
+                ),
+                migrations.AlterField(
+                    model_name='ingredient',
+                    name='name',
+                    field=models.CharField(help_text='Введите название ингредиента', max_length=150, verbose_name='название ингредиента'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='author',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='автор рецепта'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='cooking_time',
+                    field=models.PositiveIntegerField(default=5, help_text='Введите время приготовления в минутах', validators=[django.core.validators.MinValueValidator(5), django.core.validators.MaxValueValidator(1000)], verbose_name='время приготовления'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='is_in_shopping_cart',
+                    field=models.ManyToManyField(related_name='recipe_shop', through='main.RecipeShop', to=settings.AUTH_USER_MODEL, verbose_name='рецепт в корзине'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='name',
+                    field=models.CharField(help_text='Введите название рецепта', max_length=150, verbose_name='название рецепта'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='text',
+                    field=models.TextField(help_text='Введите описание рецeпта', verbose_name='описание рецпета'),
+                ),
+                migrations.AlterField(
+                    model_name='recipefavorite',
+                    name='user',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_favorite', to=settings.AUTH_USER_MODEL, verbose_name='пользователь'),
+                ),
+                migrations.AlterField(
+                    model_name='tag',
+                    name='name',
+                    field=models.CharField(help_text='Введите название тега', max_length=150, unique=True, verbose_name='название тега'),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='email',
+                    field=models.EmailField(max_length=254, unique=True),
+                ),
+            ],
+        ),
+    ]
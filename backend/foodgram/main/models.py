@@ -1,18 +1,25 @@
-import random
-import string
-
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.contenttypes.fields import (
+    GenericForeignKey,
+    GenericRelation
+)
+from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 from main.constants import (
+    BASE62,
     MAX_COOK_TIME,
     MAX_EMAIL_LENGTH,
+    MAX_FIELD_LENGTH,
     MAX_LENGTH,
     MIN_COOK_TIME,
     SHORT_URL_LENGTH,
     SHORT_URL_SPLIT,
 )
+from main.storage import content_storage
+from main.utils import base62, permute
 
 
 class User(AbstractUser):
@@ -38,12 +45,24 @@ class User(AbstractUser):
     avatar = models.ImageField(
         'Аватар',
         upload_to='users/',
+        storage=content_storage,
         blank=True
     )
     email = models.EmailField(
         max_length=MAX_EMAIL_LENGTH,
         unique=True
     )
+    image_jobs = GenericRelation('ImageJob')
+    followers_count = models.PositiveIntegerField(
+        'подписчиков',
+        default=0,
+        editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'рецептов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -129,9 +148,21 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='recipe/',
+        storage=content_storage,
         blank=True
     )
     pub_date = models.DateTimeField('дата публикации', auto_now_add=True)
+    image_jobs = GenericRelation('ImageJob')
+    favorites_count = models.PositiveIntegerField(
+        'в избранном',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'в корзинах',
+        default=0,
+        editable=False
+    )
     is_favorited = models.ManyToManyField(
         User,
         through='RecipeFavorite',
@@ -155,6 +186,16 @@ class Recipe(models.Model):
         ordering = ('pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='recipe_pub_date_id'
+            ),
+            models.Index(
+                fields=('favorites_count', 'id'),
+                name='recipe_favorites_count_id'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 name='unique_recipe',
@@ -296,17 +337,148 @@ class RecipeIngredient(models.Model):
 
 
 class ShortUrl(models.Model):
-    recipe_id = models.PositiveIntegerField()
-    short_url = models.SlugField(max_length=MAX_LENGTH)
+    recipe_id = models.PositiveIntegerField(unique=True)
+    short_url = models.SlugField(max_length=MAX_LENGTH, unique=True)
 
     @classmethod
-    def generate(self):
-        return SHORT_URL_SPLIT + ''.join(
-            random.choice(string.ascii_letters) for _ in range(
-                SHORT_URL_LENGTH
-            )
+    def generate(self, recipe_id):
+        return SHORT_URL_SPLIT + base62(
+            permute(
+                int(recipe_id),
+                settings.SHORT_URL_KEY.encode(),
+                len(BASE62) ** SHORT_URL_LENGTH
+            ),
+            SHORT_URL_LENGTH
         )
 
     @classmethod
     def find_slug(self, slug):
         return SHORT_URL_SPLIT + slug
+
+
+class ShoppingCartItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart',
+        verbose_name='пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='ингредиент'
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='общее количество ингредиента'
+    )
+
+    class Meta:
+        ordering = ('ingredient',)
+        verbose_name = 'ингредиент в корзине'
+        verbose_name_plural = 'ингредиенты в корзине'
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_cart_item',
+                fields=['user', 'ingredient']
+            ),
+        ]
+
+
+class ImageJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'в очереди'),
+        (RUNNING, 'обрабатывается'),
+        (DONE, 'готово'),
+        (FAILED, 'ошибка'),
+    )
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name='тип объекта'
+    )
+    object_id = models.PositiveIntegerField('id объекта')
+    content_object = GenericForeignKey()
+    field = models.CharField('поле', max_length=MAX_FIELD_LENGTH)
+    source = models.CharField(
+        'исходный файл',
+        max_length=MAX_LENGTH,
+        db_index=True
+    )
+    status = models.CharField(
+        'статус',
+        max_length=MAX_FIELD_LENGTH,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True
+    )
+    extension = models.CharField(
+        'расширение копий',
+        max_length=MAX_FIELD_LENGTH,
+        blank=True
+    )
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    error = models.TextField('ошибка', blank=True)
+    created = models.DateTimeField('создано', auto_now_add=True)
+    updated = models.DateTimeField('обновлено', auto_now=True)
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'обработка картинки'
+        verbose_name_plural = 'обработка картинок'
+        indexes = [
+            models.Index(
+                fields=('content_type', 'object_id'),
+                name='image_job_object'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='читатель'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='автор'
+    )
+    pub_date = models.DateTimeField('дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-recipe')
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'записи ленты'
+        indexes = [
+            models.Index(
+                fields=('user', 'pub_date', 'recipe'),
+                name='feed_user_pub_date'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_user_author'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_feed_entry',
+                fields=['user', 'recipe']
+            ),
+        ]
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from main.constants import HASH_SHARD_DEPTH, HASH_SHARD_WIDTH
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        shards = [
+            digest[index * HASH_SHARD_WIDTH:(index + 1) * HASH_SHARD_WIDTH]
+            for index in range(HASH_SHARD_DEPTH)
+        ]
+        extension = os.path.splitext(name)[1].lower()
+        return '/'.join(
+            [os.path.dirname(name), *shards, digest + extension]
+        ).lstrip('/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        saved = self._save(name, content)
+        if saved != name:
+            super().delete(saved)
+        return name
+
+    def delete(self, name):
+        pass
+
+    def purge(self, name):
+        super().delete(name)
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,53 @@
+import hashlib
+import hmac
+from itertools import islice
+
+from django.db import connection
+
+from main.constants import BASE62, SHORT_URL_ROUNDS
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_batch_size(model, size):
+    return min(size, connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, [None] * size
+    ))
+
+
+def feistel(value, key, bits):
+    half = bits // 2
+    mask = (1 << half) - 1
+    left, right = value >> half, value & mask
+    for number in range(SHORT_URL_ROUNDS):
+        digest = hmac.new(
+            key, f'{number}:{right}'.encode(), hashlib.sha256
+        ).digest()
+        left, right = right, left ^ (int.from_bytes(digest[:8], 'big') & mask)
+    return (left << half) | right
+
+
+def permute(value, key, domain):
+    if not 0 <= value < domain:
+        raise ValueError(f'{value} вне диапазона 0..{domain - 1}')
+    bits = (domain - 1).bit_length()
+    bits += bits % 2
+    value = feistel(value, key, bits)
+    while value >= domain:
+        value = feistel(value, key, bits)
+    return value
+
+
+def base62(value, length):
+    digits = []
+    for _ in range(length):
+        value, digit = divmod(value, len(BASE62))
+        digits.append(BASE62[digit])
+    return ''.join(reversed(digits))